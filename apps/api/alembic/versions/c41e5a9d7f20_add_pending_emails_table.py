@@ -0,0 +1,41 @@
+"""Add pending_emails retry queue table
+
+Revision ID: c41e5a9d7f20
+Revises: 7cdd7b95155d
+Create Date: 2025-08-20 10:12:03.418220
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41e5a9d7f20'
+down_revision: Union[str, None] = '7cdd7b95155d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('pending_emails',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('from_email', sa.String(length=255), nullable=False),
+        sa.Column('to_email', sa.String(length=255), nullable=False),
+        sa.Column('subject', sa.String(length=500), nullable=False),
+        sa.Column('html', sa.Text(), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('next_retry_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_pending_emails_id'), 'pending_emails', ['id'], unique=False)
+    op.create_index(op.f('ix_pending_emails_next_retry_at'), 'pending_emails', ['next_retry_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_pending_emails_next_retry_at'), table_name='pending_emails')
+    op.drop_index(op.f('ix_pending_emails_id'), table_name='pending_emails')
+    op.drop_table('pending_emails')
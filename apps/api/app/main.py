@@ -1,4 +1,7 @@
+import asyncio
+import logging
 from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.routes.clerk_webhooks import router as clerk_webhook_router
 from app.routes.stripe_webhooks import router as stripe_webhook_router
@@ -16,6 +19,13 @@ from app.routes.account_settings import router as account_settings_router
 from app.routes.notification_preferences import router as notification_preferences_router
 from app.routes.contact import router as contact_router
 from app.routes.admin_analytics import router as admin_analytics_router
+from app.services.email_service import (
+    close_email_client, start_email_retry_worker, stop_email_retry_worker
+)
+from app.utils.s3 import MAX_UPLOAD_REQUEST_BYTES, warm_s3_connection
+
+# Configure logging once for the application (library modules only create loggers)
+logging.basicConfig(level=logging.INFO)
 
 app = FastAPI()
 
@@ -78,12 +88,38 @@ app.include_router(products_router, prefix="/api", tags=["Products (Legacy)"])
 # app.include_router(wishlist_router, prefix="/wishlist", tags=["Wishlist (Legacy)"])
 
 
+@app.on_event("startup")
+async def startup_email_retry_worker():
+    start_email_retry_worker()
+
+@app.on_event("startup")
+async def startup_warm_s3():
+    await asyncio.to_thread(warm_s3_connection)
+
+@app.on_event("shutdown")
+async def shutdown_email_client():
+    await stop_email_retry_worker()
+    await close_email_client()
+
 @app.get("/")
 def root():
     return {"message": "Welcome to the Jewelry API"}
 
 # Include API routes here (once created)
 
+# Endpoints that take image uploads as multipart form data
+UPLOAD_PATH_SUFFIXES = ("/custom-orders/upload-images", "/custom-orders/legacy")
+
+@app.middleware("http")
+async def limit_upload_size(request: Request, call_next):
+    # Reject oversized uploads from Content-Length alone, before the form is
+    # parsed and the body spooled to a temp file
+    if request.method == "POST" and request.url.path.endswith(UPLOAD_PATH_SUFFIXES):
+        content_length = request.headers.get("content-length")
+        if content_length and content_length.isdigit() and int(content_length) > MAX_UPLOAD_REQUEST_BYTES:
+            return JSONResponse(status_code=413, content={"detail": "Upload too large."})
+    return await call_next(request)
+
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
     print(f"🔍 Incoming request: {request.method} {request.url}")
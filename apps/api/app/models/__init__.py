@@ -13,4 +13,5 @@ from app.models.user_settings import UserSetting
 from app.models.notification_preferences import NotificationPreference
 from app.models.contact import ContactInquiry, ConsultationBooking, LocationNotification
 from app.models.category import Category
-from app.models.collection import Collection
\ No newline at end of file
+from app.models.collection import Collection
+from app.models.pending_email import PendingEmail
@@ -241,6 +241,11 @@ class NotificationPreferenceManager:
             NotificationPreference.user_id == user_id
         ).first()
         
+        return cls.check_notification_allowed_for(preferences, notification_type, category)
+    
+    @classmethod
+    def check_notification_allowed_for(cls, preferences: Optional[NotificationPreference], notification_type: str, category: str) -> bool:
+        """Same as check_notification_allowed, for an already-loaded preferences row."""
         if not preferences:
             # Use defaults if no preferences exist
             default_prefs = cls.DEFAULT_PREFERENCES
@@ -256,13 +261,18 @@ class NotificationPreferenceManager:
     @classmethod
     def is_quiet_hours_active(cls, db: Session, user_id: int, current_time: datetime = None) -> bool:
         """Check if quiet hours are currently active for a user."""
-        if current_time is None:
-            current_time = datetime.now()
-        
         preferences = db.query(NotificationPreference).filter(
             NotificationPreference.user_id == user_id
         ).first()
         
+        return cls.is_quiet_hours_active_for(preferences, current_time)
+    
+    @classmethod
+    def is_quiet_hours_active_for(cls, preferences: Optional[NotificationPreference], current_time: datetime = None) -> bool:
+        """Same as is_quiet_hours_active, for an already-loaded preferences row."""
+        if current_time is None:
+            current_time = datetime.now()
+        
         if not preferences or not preferences.quiet_hours or not preferences.quiet_hours.get("enabled"):
             return False
         
@@ -299,6 +309,11 @@ class NotificationPreferenceManager:
             NotificationPreference.user_id == user_id
         ).first()
         
+        return cls.get_sms_phone_number_for(preferences)
+    
+    @classmethod
+    def get_sms_phone_number_for(cls, preferences: Optional[NotificationPreference]) -> Optional[str]:
+        """Same as get_sms_phone_number, for an already-loaded preferences row."""
         if not preferences or not preferences.sms_notifications:
             return None
         
@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime
+from sqlalchemy.sql import func
+from app.core.db import Base
+
+class PendingEmail(Base):
+    """Outbound email whose send failed transiently and is waiting to be retried"""
+    __tablename__ = "pending_emails"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    
+    # Message
+    from_email = Column(String(255), nullable=False)
+    to_email = Column(String(255), nullable=False)
+    subject = Column(String(500), nullable=False)
+    html = Column(Text, nullable=False)
+    
+    # Retry state
+    attempts = Column(Integer, nullable=False, default=0)
+    next_retry_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    last_error = Column(Text, nullable=True)
+    
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    def __repr__(self):
+        return f"<PendingEmail(to='{self.to_email}', attempts={self.attempts})>"
@@ -1,13 +1,14 @@
 # app/routes/admin.py - Fixed with notification integration
 
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, Body
+from fastapi import APIRouter, Depends, HTTPException, Body, Response
 from app.core.db import get_db
 from app.auth import verify_clerk_token
 from sqlalchemy.orm import Session
 from app.models.order import Order
-from app.schemas.order import OrderResponseSchema
+from app.schemas.order import OrderResponseSchema, dump_order_responses
 import os
+import orjson
 import requests
 import logging
 import asyncio
@@ -68,7 +69,8 @@ def get_all_orders(user=Depends(verify_clerk_token), db: Session = Depends(get_d
     if email not in ADMIN_EMAILS:
         raise HTTPException(status_code=403, detail="Access forbidden")
 
-    return db.query(Order).order_by(Order.created_at.desc()).all()
+    orders = db.query(Order).order_by(Order.created_at.desc()).all()
+    return Response(content=dump_order_responses(orders), media_type="application/json")
 
 # Remove the duplicate function and keep this enhanced version
 @router.patch("/orders/{order_id}")
@@ -217,6 +219,43 @@ def get_order_stats(
         logger.error(f"Failed to fetch order stats: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to fetch order stats: {str(e)}")
 
+def _load_json_field(value):
+    """Return a JSON column value as a dict, decoding legacy string payloads"""
+    if not value:
+        return None
+    if isinstance(value, str):
+        try:
+            return orjson.loads(value)
+        except orjson.JSONDecodeError:
+            return None
+    return value
+
+def _order_to_admin_dict(order) -> dict:
+    """Flatten an order row into the admin dashboard payload"""
+    return {
+        "id": order.id,
+        "order_number": getattr(order, 'order_number', f"ORD-{order.id}"),
+        "customer_name": getattr(order, 'customer_name', None) or getattr(order, 'guest_name', 'Guest'),
+        "customer_email": getattr(order, 'customer_email', None) or getattr(order, 'guest_email', 'N/A'),
+        "total_price": float(order.total_price),
+        "status": order.status,
+        "payment_status": getattr(order, 'payment_status', 'completed'),
+        "created_at": order.created_at,
+        "shipping_address": _load_json_field(order.shipping_address),
+        "billing_address": _load_json_field(order.billing_address),
+        "items": [
+            {
+                "id": item.id,
+                "product_id": item.product_id,
+                "product_name": item.product_name,
+                "unit_price": float(item.unit_price),
+                "quantity": item.quantity
+            }
+            for item in order.items or ()
+        ],
+        "notes": getattr(order, 'notes', None)
+    }
+
 @router.get("/orders/filtered")
 def get_filtered_orders(
     status: Optional[str] = None,
@@ -255,69 +294,18 @@ def get_filtered_orders(
         orders = query.order_by(Order.created_at.desc()).offset(offset).limit(limit).all()
         
         # Transform orders for response
-        result = []
-        for order in orders:
-            # Handle JSON fields safely
-            shipping_address = None
-            billing_address = None
-            
-            try:
-                if hasattr(order, 'shipping_address') and order.shipping_address:
-                    if isinstance(order.shipping_address, str):
-                        import json
-                        shipping_address = json.loads(order.shipping_address)
-                    else:
-                        shipping_address = order.shipping_address
-            except Exception:
-                pass
-                
-            try:
-                if hasattr(order, 'billing_address') and order.billing_address:
-                    if isinstance(order.billing_address, str):
-                        import json
-                        billing_address = json.loads(order.billing_address)
-                    else:
-                        billing_address = order.billing_address
-            except Exception:
-                pass
-            
-            # Transform order items
-            items_data = []
-            if hasattr(order, 'items') and order.items:
-                for item in order.items:
-                    items_data.append({
-                        "id": item.id,
-                        "product_id": item.product_id,
-                        "product_name": item.product_name,
-                        "unit_price": float(item.unit_price),
-                        "quantity": item.quantity
-                    })
-            
-            # Build order data
-            order_data = {
-                "id": order.id,
-                "order_number": getattr(order, 'order_number', f"ORD-{order.id}"),
-                "customer_name": getattr(order, 'customer_name', None) or getattr(order, 'guest_name', 'Guest'),
-                "customer_email": getattr(order, 'customer_email', None) or getattr(order, 'guest_email', 'N/A'),
-                "total_price": float(order.total_price),
-                "status": order.status,
-                "payment_status": getattr(order, 'payment_status', 'completed'),
-                "created_at": order.created_at.isoformat(),
-                "shipping_address": shipping_address,
-                "billing_address": billing_address,
-                "items": items_data,
-                "notes": getattr(order, 'notes', None)
-            }
-            
-            result.append(order_data)
-        
-        return {
-            "orders": result,
-            "total_count": total_count,
-            "limit": limit,
-            "offset": offset,
-            "has_more": offset + len(result) < total_count
-        }
+        result = [_order_to_admin_dict(order) for order in orders]
+        
+        return Response(
+            content=orjson.dumps({
+                "orders": result,
+                "total_count": total_count,
+                "limit": limit,
+                "offset": offset,
+                "has_more": offset + len(result) < total_count
+            }),
+            media_type="application/json"
+        )
         
     except Exception as e:
         logger.error(f"Failed to fetch filtered orders: {str(e)}")
@@ -336,56 +324,7 @@ def get_order_details(
         if not order:
             raise HTTPException(status_code=404, detail="Order not found")
         
-        # Handle JSON fields safely
-        shipping_address = None
-        billing_address = None
-        
-        try:
-            if hasattr(order, 'shipping_address') and order.shipping_address:
-                if isinstance(order.shipping_address, str):
-                    import json
-                    shipping_address = json.loads(order.shipping_address)
-                else:
-                    shipping_address = order.shipping_address
-        except Exception:
-            pass
-            
-        try:
-            if hasattr(order, 'billing_address') and order.billing_address:
-                if isinstance(order.billing_address, str):
-                    import json
-                    billing_address = json.loads(order.billing_address)
-                else:
-                    billing_address = order.billing_address
-        except Exception:
-            pass
-        
-        # Transform order items
-        items_data = []
-        if hasattr(order, 'items') and order.items:
-            for item in order.items:
-                items_data.append({
-                    "id": item.id,
-                    "product_id": item.product_id,
-                    "product_name": item.product_name,
-                    "unit_price": float(item.unit_price),
-                    "quantity": item.quantity
-                })
-        
-        return {
-            "id": order.id,
-            "order_number": getattr(order, 'order_number', f"ORD-{order.id}"),
-            "customer_name": getattr(order, 'customer_name', None) or getattr(order, 'guest_name', 'Guest'),
-            "customer_email": getattr(order, 'customer_email', None) or getattr(order, 'guest_email', 'N/A'),
-            "total_price": float(order.total_price),
-            "status": order.status,
-            "payment_status": getattr(order, 'payment_status', 'completed'),
-            "created_at": order.created_at.isoformat(),
-            "shipping_address": shipping_address,
-            "billing_address": billing_address,
-            "items": items_data,
-            "notes": getattr(order, 'notes', None)
-        }
+        return Response(content=orjson.dumps(_order_to_admin_dict(order)), media_type="application/json")
         
     except HTTPException:
         raise
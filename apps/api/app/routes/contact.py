@@ -7,7 +7,9 @@ from app.schemas.contact import (
     LocationNotificationCreate, LocationNotificationResponse
 )
 from app.models.contact import ContactInquiry, ConsultationBooking, LocationNotification
-from app.services.email_service import send_contact_inquiry_email, send_consultation_booking_email
+from app.services.email_service import (
+    dispatch_email, send_contact_inquiry_email, send_consultation_booking_email
+)
 import logging
 
 router = APIRouter(prefix="/api/contact", tags=["contact"])
@@ -40,15 +42,12 @@ async def submit_contact_inquiry(
         db.commit()
         db.refresh(db_inquiry)
         
-        # Send notification emails (background task)
-        try:
-            await send_contact_inquiry_email(
-                inquiry_data=inquiry.dict(),
-                inquiry_id=db_inquiry.id
-            )
-        except Exception as email_error:
-            logger.error(f"Email sending failed: {email_error}")
-            # Don't fail the API call if email fails
+        # Send notification emails in the background; failures are logged by the
+        # email service and never fail the API call
+        dispatch_email(send_contact_inquiry_email(
+            inquiry_data=inquiry.dict(),
+            inquiry_id=db_inquiry.id
+        ))
         
         logger.info(f"Contact inquiry submitted: {db_inquiry.id} from {inquiry.email}")
         
@@ -77,14 +76,11 @@ async def book_consultation(
         db.commit()
         db.refresh(db_booking)
         
-        # Send confirmation emails
-        try:
-            await send_consultation_booking_email(
-                booking_data=booking.dict(),
-                booking_id=db_booking.id
-            )
-        except Exception as email_error:
-            logger.error(f"Email sending failed: {email_error}")
+        # Send confirmation emails in the background
+        dispatch_email(send_consultation_booking_email(
+            booking_data=booking.dict(),
+            booking_id=db_booking.id
+        ))
         
         logger.info(f"Consultation booked: {db_booking.id} for {booking.email}")
         
@@ -15,7 +15,7 @@ from app.schemas.custom_order import (
     CustomOrderFormComplete, CustomOrderResponse, CustomOrderListResponse,
     DesignConsultationCreate, DesignConsultationOut
 )
-from app.utils.s3 import upload_inspiration_image
+from app.utils.s3 import presign_inspiration_upload, upload_inspiration_image_async
 
 router = APIRouter(prefix="/api/custom-orders", tags=["custom-orders"])
 
@@ -342,7 +342,7 @@ async def upload_custom_order_images(
         for i, file in enumerate(files):
             if file.filename:
                 # Upload to S3
-                image_url = upload_inspiration_image(file)
+                image_url = await upload_inspiration_image_async(file)
                 uploaded_urls.append(image_url)
                 
                 # If order_id provided, save to database
@@ -369,6 +369,22 @@ async def upload_custom_order_images(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error uploading images: {str(e)}")
 
+@router.post("/upload-url")
+def create_image_upload_url(content_type: str = Form(...)):
+    """Presigned S3 POST so the browser uploads an image directly; /upload-images remains the fallback"""
+    try:
+        upload = presign_inspiration_upload(content_type)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return JSONResponse(
+        status_code=200,
+        content={
+            "success": True,
+            **upload
+        }
+    )
+
 # ============================================================================
 # LEGACY COMPATIBILITY (Simple Form)
 # ============================================================================
@@ -386,7 +402,7 @@ async def submit_legacy_custom_order(
     try:
         image_url = "No image uploaded"
         if inspiration and inspiration.filename:
-            image_url = upload_inspiration_image(inspiration)
+            image_url = await upload_inspiration_image_async(inspiration)
 
         # Create order with legacy data mapped to new structure
         order = CustomOrder(
@@ -11,7 +11,7 @@ from app.models.cart import CartItem
 from app.models.order import Order, OrderItem
 from app.models.user import User
 from app.auth import verify_clerk_token
-from app.services.email_service import EmailService
+from app.services.email_service import email_service
 import logging
 
 # Configure logging
@@ -36,9 +36,6 @@ class OrderSubmissionRequest(BaseModel):
     order_notes: Optional[str] = None
     payment_intent_id: str
 
-# Initialize email service
-email_service = EmailService()
-
 # ✅ ADD THIS HELPER FUNCTION
 def get_db_user_from_clerk(db: Session, clerk_id: str) -> User:
     """Get database user by Clerk ID, raise 404 if not found."""
@@ -50,9 +47,25 @@ def get_db_user_from_clerk(db: Session, clerk_id: str) -> User:
         )
     return db_user
 
+def _unit_price_in_cents(unit_price):
+    """Order items may carry dollar prices; anything under 100 is treated as dollars"""
+    if isinstance(unit_price, (int, float)) and unit_price < 100:
+        return int(unit_price * 100)
+    return unit_price
+
 def schedule_confirmation_email(background_tasks: BackgroundTasks, email: str, order_number: str, order_details: dict):
     """Schedule email as background task"""
-    background_tasks.add_task(email_service.send_order_confirmation_email, email, order_number, order_details)
+    email_data = {
+        "to": email,
+        "user_name": order_details.get("customer_name", "Valued Customer"),
+        "order_number": order_number,
+        "total": order_details.get("total", 0),  # Should be in cents
+        "items": [
+            {**item, "unit_price": _unit_price_in_cents(item.get("unit_price", 0))}
+            for item in order_details.get("items", [])
+        ],
+    }
+    background_tasks.add_task(email_service.send_notification_email, "order_confirmation", email_data)
 
 @router.post("/create-intent")
 def create_payment_intent(
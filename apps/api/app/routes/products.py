@@ -1,6 +1,6 @@
 # routes/products.py - FIXED category filtering logic
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import desc, asc
 from typing import Optional, List
@@ -11,11 +11,14 @@ from app.models.collection import Collection
 from app.schemas.product import (
     # Legacy schemas
     ProductSchemaLegacy, PaginatedProductsResponseLegacy,
-    convert_product_to_legacy,
+    convert_product_to_legacy, format_cents,
     
     # New enhanced schemas
-    ProductOut, ProductCreate, ProductUpdate, ProductSummary, ProductListResponse,
-    CategoryOut, CollectionOut
+    ProductOut, ProductCreate, ProductUpdate, ProductListResponse,
+    CategoryOut, CollectionOut,
+
+    # Read-only response structs
+    ProductSummaryMsg, ProductListMsg, PRODUCT_LIST_ENCODER
 )
 
 router = APIRouter()
@@ -165,18 +168,18 @@ async def get_products(
     products = query.offset(offset).limit(page_size).all()
     print(f"   📦 Returning {len(products)} products for page {page}")
     
-    # CORRECTED: Create proper ProductSummary objects
+    # Build msgspec structs straight from the ORM rows; encoded without pydantic
     product_summaries = []
     for product in products:
         # Handle potential None values safely
         inventory_count = getattr(product, 'inventory_count', 0) or 0
         track_inventory = getattr(product, 'track_inventory', True)
         
-        summary = ProductSummary(
+        summary = ProductSummaryMsg(
             id=product.id,
             name=product.name,
             price=product.price or 0,
-            price_display=f"${(product.price or 0) / 100:.2f}",
+            price_display=format_cents(product.price),
             image_url=product.image_url,
             slug=product.slug,
             category_name=product.product_category.name if product.product_category else None,
@@ -190,7 +193,7 @@ async def get_products(
     
     total_pages = (total + page_size - 1) // page_size
     
-    response = ProductListResponse(
+    response = ProductListMsg(
         products=product_summaries,
         total=total,
         page=page,
@@ -201,7 +204,7 @@ async def get_products(
     )
     
     print(f"📤 API Response: {len(response.products)} products, page {response.page}/{response.total_pages}")
-    return response
+    return Response(content=PRODUCT_LIST_ENCODER.encode(response), media_type="application/json")
 
 # ==========================================
 # DEBUG ENDPOINT - Add this for testing
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, Field, validator
-from typing import List, Optional, Dict, Any
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, ValidationInfo, WrapValidator, validator
+from typing import Annotated, List, Literal, Optional, Dict, Any
 from datetime import datetime
 from enum import Enum
 
@@ -26,6 +26,14 @@ class ItemStatusEnum(str, Enum):
     SHIPPED = "shipped"
     DELIVERED = "delivered"
 
+# Literal field types (validated as plain strings); the enums above stay as constants
+OrderStatusLiteral = Literal[
+    "pending", "processing", "confirmed", "shipped",
+    "delivered", "cancelled", "failed", "completed",
+]
+PaymentStatusLiteral = Literal["pending", "completed", "failed", "refunded"]
+ItemStatusLiteral = Literal["pending", "processing", "shipped", "delivered"]
+
 # Enhanced Order Item Schema
 class OrderItemSchema(BaseModel):
     id: Optional[int] = None
@@ -41,7 +49,7 @@ class OrderItemSchema(BaseModel):
     product_image_url: Optional[str] = None
     product_category: Optional[str] = None
     custom_options: Optional[Dict[str, Any]] = None
-    item_status: ItemStatusEnum = ItemStatusEnum.PENDING
+    item_status: ItemStatusLiteral = "pending"
     tracking_info: Optional[Dict[str, Any]] = None
     
     # Timestamps
@@ -56,7 +64,6 @@ class OrderItemSchema(BaseModel):
 
     class Config:
         from_attributes = True
-        use_enum_values = True
 
 # Address Schema
 class AddressSchema(BaseModel):
@@ -69,13 +76,46 @@ class AddressSchema(BaseModel):
     city: Optional[str] = None
     state: Optional[str] = None
     postal_code: Optional[str] = None
-    country: Optional[str] = "US"
+    country: str = "US"
 
-    class Config:
-        from_attributes = True
+    # Frozen: addresses are never mutated after validation, so no defensive copies
+    model_config = ConfigDict(from_attributes=True, frozen=True)
+
+# Address as stored on an order. Checkout saves the client's dict as-is, so
+# keep extra keys (e.g. apt), accept numeric postal codes and never invent a country
+class OrderAddressSchema(AddressSchema):
+    country: Optional[str] = None
+
+    model_config = ConfigDict(from_attributes=True, frozen=True, extra="allow", coerce_numbers_to_str=True)
+
+def _stored_address(value: Any, handler, info: ValidationInfo) -> Any:
+    """Validate an order address, or construct it as-is when the caller marks the source as trusted"""
+    if isinstance(value, dict) and info.context and info.context.get("trusted_addresses"):
+        # Skip validation for ORM rows, but stringify numbers like validation would
+        return OrderAddressSchema.model_construct(**{
+            key: str(val) if isinstance(val, (int, float)) and not isinstance(val, bool) else val
+            for key, val in value.items()
+        })
+    return handler(value)
+
+StoredAddress = Annotated[Optional[OrderAddressSchema], WrapValidator(_stored_address)]
+
+# Shared customer helpers for the order schemas
+class _CustomerNameMixin:
+    @property
+    def full_customer_name(self) -> str:
+        """Get the full customer name"""
+        if self.customer_first_name and self.customer_last_name:
+            return f"{self.customer_first_name} {self.customer_last_name}".strip()
+        return self.guest_name or "Unknown Customer"
+
+    @property
+    def customer_email_address(self) -> Optional[str]:
+        """Get customer email (prefer detailed over guest)"""
+        return self.customer_email or self.guest_email
 
 # Enhanced Order Schema
-class OrderSchema(BaseModel):
+class OrderSchema(_CustomerNameMixin, BaseModel):
     id: Optional[int] = None
     order_number: Optional[str] = None
     
@@ -103,12 +143,12 @@ class OrderSchema(BaseModel):
     promo_discount: Optional[float] = None
     
     # Status information
-    status: OrderStatusEnum = OrderStatusEnum.PENDING
-    payment_status: PaymentStatusEnum = PaymentStatusEnum.PENDING
+    status: OrderStatusLiteral = "pending"
+    payment_status: PaymentStatusLiteral = "pending"
     
     # Addresses
-    shipping_address: Optional[Dict[str, Any]] = None
-    billing_address: Optional[Dict[str, Any]] = None
+    shipping_address: StoredAddress = None
+    billing_address: StoredAddress = None
     
     # Shipping information
     shipping_method_id: Optional[str] = None
@@ -146,21 +186,8 @@ class OrderSchema(BaseModel):
     # Order items
     items: List[OrderItemSchema] = []
 
-    @property
-    def full_customer_name(self) -> str:
-        """Get the full customer name"""
-        if self.customer_first_name and self.customer_last_name:
-            return f"{self.customer_first_name} {self.customer_last_name}".strip()
-        return self.guest_name or "Unknown Customer"
-    
-    @property
-    def customer_email_address(self) -> Optional[str]:
-        """Get customer email (prefer detailed over guest)"""
-        return self.customer_email or self.guest_email
-
     class Config:
         from_attributes = True
-        use_enum_values = True
 
 # Response Schemas (what gets sent to frontend)
 class OrderItemResponseSchema(BaseModel):
@@ -178,7 +205,7 @@ class OrderItemResponseSchema(BaseModel):
     class Config:
         from_attributes = True
 
-class OrderResponseSchema(BaseModel):
+class OrderResponseSchema(_CustomerNameMixin, BaseModel):
     """Complete order response for admin/user viewing"""
     id: int
     order_number: Optional[str] = None
@@ -207,8 +234,8 @@ class OrderResponseSchema(BaseModel):
     payment_status: str
     
     # Addresses
-    shipping_address: Optional[Dict[str, Any]] = None
-    billing_address: Optional[Dict[str, Any]] = None
+    shipping_address: StoredAddress = None
+    billing_address: StoredAddress = None
     
     # Shipping information
     shipping_method_name: Optional[str] = None
@@ -232,18 +259,11 @@ class OrderResponseSchema(BaseModel):
     # Order items
     items: List[OrderItemResponseSchema] = []
 
-    @property
-    def full_customer_name(self) -> str:
-        """Get the full customer name"""
-        if self.customer_first_name and self.customer_last_name:
-            return f"{self.customer_first_name} {self.customer_last_name}".strip()
-        return self.guest_name or "Unknown Customer"
-
     class Config:
         from_attributes = True
 
 # Admin-specific schemas
-class AdminOrderListResponseSchema(BaseModel):
+class AdminOrderListResponseSchema(_CustomerNameMixin, BaseModel):
     """Simplified order list for admin dashboard"""
     id: int
     order_number: Optional[str] = None
@@ -257,15 +277,8 @@ class AdminOrderListResponseSchema(BaseModel):
     payment_status: str
     created_at: datetime
     items: List[OrderItemResponseSchema] = []
-    shipping_address: Optional[Dict[str, Any]] = None
-    billing_address: Optional[Dict[str, Any]] = None
-
-    @property
-    def full_customer_name(self) -> str:
-        """Get the full customer name"""
-        if self.customer_first_name and self.customer_last_name:
-            return f"{self.customer_first_name} {self.customer_last_name}".strip()
-        return self.guest_name or "Unknown Customer"
+    shipping_address: StoredAddress = None
+    billing_address: StoredAddress = None
 
     class Config:
         from_attributes = True
@@ -291,7 +304,7 @@ class CreateOrderRequest(BaseModel):
 
 class UpdateOrderStatusRequest(BaseModel):
     """Schema for updating order status"""
-    status: OrderStatusEnum
+    status: OrderStatusLiteral
     reason: Optional[str] = None
     internal_notes: Optional[str] = None
 
@@ -318,8 +331,8 @@ class OrderStatusHistorySchema(BaseModel):
 class OrderSearchRequest(BaseModel):
     """Schema for searching orders"""
     search_term: Optional[str] = None
-    status_filter: Optional[OrderStatusEnum] = None
-    payment_status_filter: Optional[PaymentStatusEnum] = None
+    status_filter: Optional[OrderStatusLiteral] = None
+    payment_status_filter: Optional[PaymentStatusLiteral] = None
     date_from: Optional[datetime] = None
     date_to: Optional[datetime] = None
     customer_email: Optional[str] = None
@@ -338,33 +351,14 @@ class OrderSearchResponse(BaseModel):
     class Config:
         from_attributes = True
 
-# Analytics schemas
-class OrderStatsSchema(BaseModel):
-    """Order statistics for dashboard"""
-    total_orders: int
-    total_revenue: float
-    pending_orders: int
-    confirmed_orders: int
-    shipped_orders: int
-    delivered_orders: int
-    cancelled_orders: int
-    average_order_value: float
-
-class OrderTrendsSchema(BaseModel):
-    """Order trends over time"""
-    date: datetime
-    order_count: int
-    revenue: float
-    average_order_value: float
-
-# Email notification schemas
-class OrderEmailSchema(BaseModel):
-    """Schema for order email data"""
-    order_number: str
-    customer_name: str
-    customer_email: str
-    total_price: float
-    items: List[OrderItemResponseSchema]
-    shipping_address: Optional[Dict[str, Any]] = None
-    tracking_number: Optional[str] = None
-    estimated_delivery: Optional[datetime] = None
\ No newline at end of file
+# Compiled once at import so list endpoints reuse the same validator/serializer
+_ORDER_RESP_ADAPTER = TypeAdapter(List[OrderResponseSchema])
+
+# ORM rows come straight from the orders table, so their addresses skip re-validation
+_TRUSTED_ORM = {"trusted_addresses": True}
+
+def dump_order_responses(orders) -> bytes:
+    """Serialize ORM orders as a full order response JSON payload"""
+    return _ORDER_RESP_ADAPTER.dump_json(
+        _ORDER_RESP_ADAPTER.validate_python(orders, from_attributes=True, context=_TRUSTED_ORM), by_alias=True
+    )
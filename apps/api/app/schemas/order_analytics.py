@@ -0,0 +1,23 @@
+# schemas/order_analytics.py - kept out of schemas/order.py so request-path
+# imports don't build these models at startup
+
+from pydantic import BaseModel
+from datetime import datetime
+
+class OrderStatsSchema(BaseModel):
+    """Order statistics for dashboard"""
+    total_orders: int
+    total_revenue: float
+    pending_orders: int
+    confirmed_orders: int
+    shipped_orders: int
+    delivered_orders: int
+    cancelled_orders: int
+    average_order_value: float
+
+class OrderTrendsSchema(BaseModel):
+    """Order trends over time"""
+    date: datetime
+    order_count: int
+    revenue: float
+    average_order_value: float
@@ -0,0 +1,17 @@
+# schemas/order_email.py - only needed by email workers; import lazily
+
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import datetime
+from app.schemas.order import OrderItemResponseSchema, StoredAddress
+
+class OrderEmailSchema(BaseModel):
+    """Schema for order email data"""
+    order_number: str
+    customer_name: str
+    customer_email: str
+    total_price: float
+    items: List[OrderItemResponseSchema]
+    shipping_address: StoredAddress = None
+    tracking_number: Optional[str] = None
+    estimated_delivery: Optional[datetime] = None
@@ -1,9 +1,22 @@
 # schemas/product.py
 
-from pydantic import BaseModel, Field, ConfigDict, computed_field
+import msgspec
+from pydantic import BaseModel, Field, ConfigDict, computed_field, model_validator
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 
+_ZERO_DISPLAY = "$0.00"
+
+def format_cents(cents: int) -> str:
+    """Format an integer amount in cents as a dollar display string ($24.99)"""
+    if not cents:
+        return _ZERO_DISPLAY
+    if cents < 0:
+        dollars, remainder = divmod(-cents, 100)
+        return f"$-{dollars}.{remainder:02d}"
+    dollars, remainder = divmod(cents, 100)
+    return f"${dollars}.{remainder:02d}"
+
 # ==========================================
 # LEGACY SCHEMAS (KEEP FOR COMPATIBILITY)
 # ==========================================
@@ -15,10 +28,10 @@ class ProductSchemaLegacy(BaseModel):
     description: Optional[str] = None
     price: float  # Keep as float (dollars) for legacy compatibility
     image_url: Optional[str]
-    image_urls: Optional[List[str]] = []
+    image_urls: Optional[List[str]] = Field(default_factory=list)
     category: Optional[str] = None  # Keep as string
     featured: Optional[bool] = None
-    details: Optional[Dict[str, str]] = {}
+    details: Optional[Dict[str, str]] = Field(default_factory=dict)
     display_theme: Optional[str] = "dark"
 
     class Config:
@@ -136,7 +149,7 @@ class ProductBase(BaseModel):
     review_count: Optional[int] = Field(default=0)
     
     # Legacy fields
-    details: Optional[Dict[str, Any]] = {}
+    details: Optional[Dict[str, Any]] = Field(default_factory=dict)
     display_theme: Optional[str] = "dark"
     
     # Admin fields
@@ -162,35 +175,28 @@ class ProductOut(ProductBase):
     published_at: Optional[datetime] = None
     discontinued_at: Optional[datetime] = None
     
-    model_config = ConfigDict(from_attributes=True)
-    
-    # Computed fields - Let Pydantic calculate these
-    @computed_field
-    @property
-    def price_display(self) -> str:
-        """Format price for display (convert cents to dollars)"""
-        return f"${(self.price or 0) / 100:.2f}"
-    
-    @computed_field
-    @property
-    def compare_price_display(self) -> Optional[str]:
-        """Format compare price for display"""
-        return f"${(self.compare_at_price or 0) / 100:.2f}" if self.compare_at_price else None
+    # Pricing display - filled in once by derive_pricing below; the aliases keep
+    # from_attributes from calling the matching Product properties first
+    price_display: str = Field("$0.00", validation_alias="_derived_price_display")
+    compare_price_display: Optional[str] = Field(None, validation_alias="_derived_compare_price_display")
+    is_on_sale: bool = Field(False, validation_alias="_derived_is_on_sale")
+    discount_percentage: int = Field(0, validation_alias="_derived_discount_percentage")
     
-    @computed_field
-    @property
-    def is_on_sale(self) -> bool:
-        """Check if product is on sale"""
-        return bool(self.compare_at_price and self.price and self.price < self.compare_at_price)
+    model_config = ConfigDict(from_attributes=True)
     
-    @computed_field
-    @property
-    def discount_percentage(self) -> int:
-        """Calculate discount percentage"""
-        if not self.is_on_sale or not self.compare_at_price:
-            return 0
-        return int(((self.compare_at_price - self.price) / self.compare_at_price) * 100)
+    @model_validator(mode="after")
+    def derive_pricing(self) -> "ProductOut":
+        """Compute all price-derived display fields in a single pass"""
+        price = self.price or 0
+        compare_at = self.compare_at_price
+        on_sale = bool(compare_at and price and price < compare_at)
+        self.price_display = format_cents(price)
+        self.compare_price_display = format_cents(compare_at) if compare_at else None
+        self.is_on_sale = on_sale
+        self.discount_percentage = int(((compare_at - price) / compare_at) * 100) if on_sale else 0
+        return self
     
+    # Computed fields - Let Pydantic calculate these
     @computed_field
     @property
     def in_stock(self) -> bool:
@@ -263,12 +269,43 @@ class ProductListResponse(BaseModel):
     has_next: bool
     has_prev: bool
 
+# ==========================================
+# MSGSPEC RESPONSE STRUCTS (READ-ONLY HOT PATH)
+# ==========================================
+
+class ProductSummaryMsg(msgspec.Struct, frozen=True, gc=False):
+    """msgspec mirror of ProductSummary for product list responses"""
+    id: int
+    name: str
+    price: int  # Cents
+    price_display: str  # $24.99
+    image_url: Optional[str] = None
+    slug: Optional[str] = None
+    category_name: Optional[str] = None
+    featured: bool = False
+    in_stock: bool = True
+    average_rating: Optional[float] = 0.0
+    display_theme: Optional[str] = "dark"
+
+class ProductListMsg(msgspec.Struct, frozen=True, gc=False):
+    """msgspec mirror of ProductListResponse"""
+    products: List[ProductSummaryMsg]
+    total: int
+    page: int
+    page_size: int
+    total_pages: int
+    has_next: bool
+    has_prev: bool
+
+PRODUCT_LIST_ENCODER = msgspec.json.Encoder()
+
 # ==========================================
 # CONVERSION HELPERS (UPDATED)
 # ==========================================
 
 def convert_product_to_legacy(product) -> ProductSchemaLegacy:
     """Convert enhanced product to legacy format"""
+    category_obj = product.product_category
     return ProductSchemaLegacy(
         id=product.id,
         name=product.name,
@@ -276,7 +313,7 @@ def convert_product_to_legacy(product) -> ProductSchemaLegacy:
         price=(product.price / 100) if product.price else 0,  # Convert cents to dollars
         image_url=product.image_url,
         image_urls=product.image_urls or [],
-        category=getattr(product.category_obj, 'name', None) if hasattr(product, 'category_obj') else product.category,
+        category=category_obj.name if category_obj is not None else product.category_string,
         featured=product.featured,
         details=product.details or {},
         display_theme=product.display_theme
@@ -284,14 +321,15 @@ def convert_product_to_legacy(product) -> ProductSchemaLegacy:
 
 def create_product_summary(product) -> ProductSummary:
     """Create ProductSummary from Product model"""
+    category_obj = product.product_category
     return ProductSummary(
         id=product.id,
         name=product.name,
         price=product.price or 0,
-        price_display=f"${(product.price / 100):.2f}" if product.price else "$0.00",
+        price_display=format_cents(product.price),
         image_url=product.image_url,
         slug=product.slug,
-        category_name=getattr(product.category_obj, 'name', None) if hasattr(product, 'category_obj') else product.category,
+        category_name=category_obj.name if category_obj is not None else product.category_string,
         featured=product.featured or False,
         in_stock=product.is_in_stock if hasattr(product, 'is_in_stock') else True,
         average_rating=product.average_rating or 0.0
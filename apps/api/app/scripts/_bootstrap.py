@@ -0,0 +1,12 @@
+# Shared setup for running the scripts in this directory directly
+import sys
+import os
+from dotenv import load_dotenv
+
+# Ensure FastAPI app path is added
+API_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if API_ROOT not in sys.path:
+    sys.path.append(API_ROOT)
+
+# Load environment variables
+load_dotenv()
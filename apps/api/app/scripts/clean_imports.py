@@ -5,38 +5,84 @@ Scans for unused imports in Python and TypeScript files.
 """
 
 import ast
+import hashlib
+import os
+import pickle
 import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from typing import Set, Dict, List, Tuple
 
-class PythonImportCleaner(ast.NodeVisitor):
-    """AST visitor to analyze Python imports and usage."""
+# Parsed ASTs are cached per content hash and interpreter version
+AST_CACHE_DIR = Path.home() / ".cache" / "jasonco_import_cleaner"
+_AST_CACHE_TAG = f"py{sys.version_info.major}{sys.version_info.minor}"
+
+# TypeScript import statement (default, named and namespace forms), compiled once
+_TS_IMPORT_RE = re.compile(
+    r'import\s+(?:(?P<default>\w+)(?:\s*,\s*)?)?'
+    r'(?:\{(?P<named>[^}]+)\})?'
+    r'(?:\*\s+as\s+(?P<ns>\w+))?\s*from'
+)
+_TS_IDENTIFIER_RE = re.compile(r'[A-Za-z_$][A-Za-z0-9_$]*')
+
+# Cheap pre-check so import-free modules are never parsed
+_HAS_IMPORT_RE = re.compile(r'^\s*(?:from|import)\s', re.M)
+
+class PythonImportCleaner:
+    """Collects Python imports and name usage in a single AST walk."""
     
     def __init__(self):
         self.imports: Set[str] = set()
         self.from_imports: Dict[str, str] = {}
         self.used_names: Set[str] = set()
         self.import_lines: List[Tuple[int, str]] = []
+    
+    def scan(self, tree: ast.AST):
+        imports = self.imports
+        from_imports = self.from_imports
+        used_names = self.used_names
+        import_lines = self.import_lines
+        Name, Import, ImportFrom = ast.Name, ast.Import, ast.ImportFrom
         
-    def visit_Import(self, node):
-        for alias in node.names:
-            name = alias.asname if alias.asname else alias.name
-            self.imports.add(name)
-            self.import_lines.append((node.lineno, f"import {alias.name}"))
-            
-    def visit_ImportFrom(self, node):
-        if node.module:
-            for alias in node.names:
-                name = alias.asname if alias.asname else alias.name
-                self.from_imports[name] = node.module
-                self.import_lines.append((node.lineno, f"from {node.module} import {alias.name}"))
-                
-    def visit_Name(self, node):
-        self.used_names.add(node.id)
-        
-    def visit_Attribute(self, node):
-        if isinstance(node.value, ast.Name):
-            self.used_names.add(node.value.id)
+        # ast.walk reaches every Name, including the roots of attribute chains
+        for node in ast.walk(tree):
+            node_type = node.__class__
+            if node_type is Name:
+                used_names.add(node.id)
+            elif node_type is Import:
+                for alias in node.names:
+                    imports.add(alias.asname or alias.name)
+                    import_lines.append((node.lineno, f"import {alias.name}"))
+            elif node_type is ImportFrom and node.module:
+                for alias in node.names:
+                    from_imports[alias.asname or alias.name] = node.module
+                    import_lines.append((node.lineno, f"from {node.module} import {alias.name}"))
+
+def parse_python_cached(content: str) -> ast.Module:
+    """Parse Python source, reusing a pickled AST when the content is unchanged."""
+    key = hashlib.sha256(content.encode('utf-8')).hexdigest()
+    cache_file = AST_CACHE_DIR / f"{_AST_CACHE_TAG}-{key}.pickle"
+    try:
+        with open(cache_file, 'rb') as f:
+            return pickle.load(f)
+    except FileNotFoundError:
+        pass
+    except Exception:
+        # Truncated or incompatible entry; drop it and reparse
+        try:
+            cache_file.unlink()
+        except OSError:
+            pass
+    
+    tree = ast.parse(content)
+    try:
+        AST_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        with open(cache_file, 'wb') as f:
+            pickle.dump(tree, f, protocol=pickle.HIGHEST_PROTOCOL)
+    except OSError:
+        pass  # Caching is best effort
+    return tree
 
 def analyze_python_file(file_path: Path) -> Tuple[bool, List[str]]:
     """Analyze a Python file for unused imports."""
@@ -44,9 +90,12 @@ def analyze_python_file(file_path: Path) -> Tuple[bool, List[str]]:
         with open(file_path, 'r', encoding='utf-8') as f:
             content = f.read()
         
-        tree = ast.parse(content)
+        if not _HAS_IMPORT_RE.search(content):
+            return False, []
+        
+        tree = parse_python_cached(content)
         cleaner = PythonImportCleaner()
-        cleaner.visit(tree)
+        cleaner.scan(tree)
         
         # Find unused imports
         unused_imports = []
@@ -84,15 +133,20 @@ def analyze_typescript_file(file_path: Path) -> Tuple[bool, List[str]]:
             if line.startswith('import ') and not line.startswith('import type'):
                 import_info.append((i + 1, line))
         
+        if not import_info:
+            return False, []
+        
+        # Content after the last import, joined and tokenized once per file
+        last_import_line = max(line_num for line_num, _ in import_info)
+        content_without_import = '\n'.join(lines[last_import_line:])
+        identifiers = set(_TS_IDENTIFIER_RE.findall(content_without_import))
+        
         # Check each import
         for line_num, import_line in import_info:
-            # Extract imported identifiers
+            # Extract imported identifiers; each is then a set lookup
             imports = extract_ts_imports(import_line)
-            content_without_import = '\n'.join(lines[line_num:])  # Content after import
-            
             for imported_name in imports:
-                # Simple check: if the name appears in the file after the import
-                if not re.search(r'\b' + re.escape(imported_name) + r'\b', content_without_import):
+                if imported_name not in identifiers:
                     unused_imports.append(f"Line {line_num}: Potentially unused import '{imported_name}'")
         
         return len(unused_imports) > 0, unused_imports
@@ -102,90 +156,94 @@ def analyze_typescript_file(file_path: Path) -> Tuple[bool, List[str]]:
 
 def extract_ts_imports(import_line: str) -> List[str]:
     """Extract imported names from a TypeScript import statement."""
-    imports = []
+    match = _TS_IMPORT_RE.match(import_line)
+    if not match:
+        return []
     
-    # Handle different import patterns
-    patterns = [
-        r'import\s+(\w+)\s+from',  # default import
-        r'import\s+\{([^}]+)\}',   # named imports
-        r'import\s+\*\s+as\s+(\w+)',  # namespace import
-    ]
-    
-    for pattern in patterns:
-        matches = re.findall(pattern, import_line)
-        for match in matches:
-            if '{' in import_line and '}' in import_line:
-                # Named imports - split by comma
-                names = [name.strip().split(' as ')[0] for name in match.split(',')]
-                imports.extend(names)
-            else:
-                imports.append(match)
+    imports = []
+    if match['default']:
+        imports.append(match['default'])
+    if match['named']:
+        # Named imports - split by comma, keeping the imported (not aliased) name
+        imports.extend(name.strip().split(' as ')[0] for name in match['named'].split(','))
+    if match['ns']:
+        imports.append(match['ns'])
     
     return [imp.strip() for imp in imports if imp.strip()]
 
-def scan_project_files() -> Tuple[List[Path], List[Path]]:
+PYTHON_SKIP_DIRS = frozenset({'venv', '__pycache__', '.venv', 'env', 'migrations'})
+TS_SKIP_DIRS = frozenset({'node_modules', '.next', 'dist', 'build'})
+
+def _walk(root: Path, skip_dirs: Set[str], exts: Tuple[str, ...]):
+    """Yield files under root ending in exts, pruning skipped directories."""
+    stack = [str(root)]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in skip_dirs:
+                            stack.append(entry.path)
+                    elif entry.name.endswith(exts):
+                        yield Path(entry.path)
+        except OSError:
+            continue
+
+def scan_project_files(project_root: Path) -> Tuple[List[Path], List[Path]]:
     """Scan project for Python and TypeScript files."""
-    project_root = Path.cwd()
-    
-    # Python files
-    python_files = list(project_root.rglob("*.py"))
-    # Filter out virtual environments, __pycache__, etc.
-    python_files = [
-        f for f in python_files 
-        if not any(part in str(f) for part in ['venv', '__pycache__', '.venv', 'env', 'migrations'])
-    ]
-    
-    # TypeScript files
-    ts_files = list(project_root.rglob("*.ts")) + list(project_root.rglob("*.tsx"))
-    # Filter out node_modules, .next, etc.
-    ts_files = [
-        f for f in ts_files 
-        if not any(part in str(f) for part in ['node_modules', '.next', 'dist', 'build'])
-    ]
+    # Python files - virtual environments, __pycache__, etc. are never entered
+    python_files = list(_walk(project_root, PYTHON_SKIP_DIRS, ('.py',)))
+    
+    # TypeScript files - node_modules, .next, etc. are never entered
+    ts_files = list(_walk(project_root, TS_SKIP_DIRS, ('.ts', '.tsx')))
     
     return python_files, ts_files
 
+def _write_issues(files: List[Path], results: List[Tuple[bool, List[str]]], cwd: Path) -> int:
+    """Write every file's issues with a single stdout write; return the file count."""
+    out = []
+    files_with_issues = 0
+    for file_path, (has_issues, issues) in zip(files, results):
+        if has_issues:
+            files_with_issues += 1
+            out.append(f"\n📄 {file_path.relative_to(cwd)}\n")
+            for issue in issues:
+                out.append(f"  ⚠️  {issue}\n")
+    sys.stdout.write("".join(out))
+    return files_with_issues
+
 def main():
     """Main function to run import cleanup analysis."""
     print("🔍 Jason & Co. Import Cleanup Scanner")
     print("=" * 50)
     
-    python_files, ts_files = scan_project_files()
+    cwd = Path.cwd()
+    python_files, ts_files = scan_project_files(cwd)
     
     print(f"📁 Found {len(python_files)} Python files")
     print(f"📁 Found {len(ts_files)} TypeScript files")
     print()
     
+    # Files are analyzed independently, so fan them out across processes
+    with ProcessPoolExecutor() as executor:
+        python_results = list(executor.map(analyze_python_file, python_files, chunksize=32))
+        ts_results = list(executor.map(analyze_typescript_file, ts_files, chunksize=32))
+    
     # Analyze Python files
-    python_issues = 0
     print("🐍 PYTHON FILES:")
     print("-" * 30)
     
-    for py_file in python_files:
-        has_issues, issues = analyze_python_file(py_file)
-        if has_issues:
-            python_issues += 1
-            rel_path = py_file.relative_to(Path.cwd())
-            print(f"\n📄 {rel_path}")
-            for issue in issues:
-                print(f"  ⚠️  {issue}")
+    python_issues = _write_issues(python_files, python_results, cwd)
     
     if python_issues == 0:
         print("✅ No unused imports found in Python files!")
     
     # Analyze TypeScript files
-    ts_issues = 0
     print(f"\n\n📜 TYPESCRIPT FILES:")
     print("-" * 30)
     
-    for ts_file in ts_files:
-        has_issues, issues = analyze_typescript_file(ts_file)
-        if has_issues:
-            ts_issues += 1
-            rel_path = ts_file.relative_to(Path.cwd())
-            print(f"\n📄 {rel_path}")
-            for issue in issues:
-                print(f"  ⚠️  {issue}")
+    ts_issues = _write_issues(ts_files, ts_results, cwd)
     
     if ts_issues == 0:
         print("✅ No unused imports found in TypeScript files!")
@@ -1,20 +1,12 @@
-import sys
 import os
-from sqlalchemy.orm import Session
-from dotenv import load_dotenv
+from sqlalchemy import Boolean, Numeric, String, Text, column, exists, insert, select, values
 
-# Ensure FastAPI app path is added
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+if not __package__:
+    import _bootstrap  # noqa: F401 - run as a script: add the app path, load .env
 
-# Load environment variables
-load_dotenv()
-
-from app.core.db import SessionLocal, engine, Base
+from app.core.db import engine, Base
 from app.models.product import Product
 
-# Ensure tables are created
-Base.metadata.create_all(bind=engine)
-
 # Sample product data
 sample_products = [
   {
@@ -147,23 +139,39 @@ sample_products = [
   },
 ];
 
+# Seed keys in insert order (column names on the products table)
+SEED_COLUMNS = ("name", "description", "price", "image_url", "category", "featured")
+
+def build_seed_statement():
+    """INSERT ... SELECT of every sample product whose name isn't already present"""
+    products = Product.__table__
+    seed_rows = values(
+        column("name", String),
+        column("description", Text),
+        column("price", Numeric),
+        column("image_url", String),
+        column("category", String),
+        column("featured", Boolean),
+        name="seed",
+    ).data([tuple(product[key] for key in SEED_COLUMNS) for product in sample_products])
+    return insert(products).from_select(
+        SEED_COLUMNS,
+        select(seed_rows).where(~exists().where(products.c.name == seed_rows.c.name)),
+    )
+
 # Function to seed data
 def seed_products():
-    db: Session = SessionLocal()
     try:
         print("Seeding products...")
-        for product in sample_products:
-            exists = db.query(Product).filter(Product.name == product["name"]).first()
-            if not exists:
-                new_product = Product(**product)
-                db.add(new_product)
-        db.commit()
-        print("✅ Products seeded successfully!")
+        # One statement, one round-trip; column defaults are still applied
+        with engine.begin() as conn:
+            result = conn.execute(build_seed_statement())
+        print(f"✅ Products seeded successfully! ({result.rowcount} inserted)")
     except Exception as e:
-        db.rollback()
         print(f"❌ Error seeding products: {e}")
-    finally:
-        db.close()
 
 if __name__ == "__main__":
+    # Table creation is opt-in so importing this module stays free of DB I/O
+    if os.getenv("SEED_CREATE_ALL"):
+        Base.metadata.create_all(bind=engine)
     seed_products()
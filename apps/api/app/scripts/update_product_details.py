@@ -1,20 +1,11 @@
-import sys
 import os
-from sqlalchemy.orm import Session
-from dotenv import load_dotenv
 
-# Ensure FastAPI app path is added
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
-
-# Load environment variables
-load_dotenv()
+if not __package__:
+    import _bootstrap  # noqa: F401 - run as a script: add the app path, load .env
 
 from app.core.db import SessionLocal, engine, Base
 from app.models.product import Product
 
-# Ensure tables are created
-Base.metadata.create_all(bind=engine)
-
 # Mapping of product names to their details
 product_details_map = {
     "Diamond Necklace": {
@@ -107,23 +98,27 @@ product_details_map = {
 
 # Function to update existing products with details
 def update_product_details():
-    db: Session = SessionLocal()
     try:
         print("Updating product details...")
-        for name, details in product_details_map.items():
-            product = db.query(Product).filter(Product.name == name).first()
-            if product:
-                product.details = details
-                print(f"✅ Updated: {name}")
-            else:
-                print(f"❌ Not found: {name}")
-        db.commit()
+        # Commits once when the block exits, rolls back on error
+        with SessionLocal.begin() as db:
+            products_by_name = {
+                product.name: product
+                for product in db.query(Product).filter(Product.name.in_(list(product_details_map))).all()
+            }
+            for name, details in product_details_map.items():
+                product = products_by_name.get(name)
+                if product:
+                    product.details = details
+                    print(f"✅ Updated: {name}")
+                else:
+                    print(f"❌ Not found: {name}")
         print("🎉 All updates committed!")
     except Exception as e:
-        db.rollback()
         print(f"❌ Error updating products: {e}")
-    finally:
-        db.close()
 
 if __name__ == "__main__":
+    # Table creation is opt-in so importing this module stays free of DB I/O
+    if os.getenv("SEED_CREATE_ALL"):
+        Base.metadata.create_all(bind=engine)
     update_product_details()
@@ -1,49 +1,121 @@
 # app/services/cart_events.py - Cart Event Handlers
 
+import asyncio
+from collections import defaultdict
 from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+import orjson
+import redis.asyncio as aioredis
+from redis.exceptions import RedisError
+from sqlalchemy import Row, func
 from sqlalchemy.orm import Session
+from app.core.config import REDIS_URL
 from app.models.user import User
 from app.models.cart import CartItem
+from app.models.product import Product
 from app.services.notification_service import send_abandoned_cart_reminder
 import logging
 
 logger = logging.getLogger(__name__)
 
+ABANDONED_CART_CONCURRENCY = 10
+CART_NOTIFICATION_CACHE_TTL = 3600
+
+def _cart_items_query(db: Session):
+    """Cart item rows with only the product columns needed for reminders"""
+    return db.query(
+        CartItem.user_id, CartItem.quantity, Product.name, Product.price, Product.image_url
+    ).join(Product, CartItem.product_id == Product.id)
+
+def _cart_totals_query(db: Session):
+    """Per-user cart totals (price * quantity) computed in SQL"""
+    return db.query(
+        CartItem.user_id, func.coalesce(func.sum(Product.price * CartItem.quantity), 0)
+    ).join(Product, CartItem.product_id == Product.id).group_by(CartItem.user_id)
+
+def _cart_notification_key(user_id: int, cart_version: str) -> str:
+    return f"cart_notif:{user_id}:{cart_version}"
+
+def _build_notification_data(cart_items: List[Row], cart_total: int) -> dict:
+    """Reminder payload for a user's cart"""
+    return {
+        "cart_items": [
+            {
+                "name": item.name,
+                "quantity": item.quantity,
+                "price": item.price,
+                "image": item.image_url
+            }
+            for item in cart_items
+        ],
+        "cart_total": cart_total,
+        "cart_url": "https://jasonjewels.com/cart"
+    }
+
+async def _load_cached_notifications(cache, keys: Dict[int, str]) -> Dict[int, dict]:
+    """Fetch cached reminder payloads for the given user ids in one MGET"""
+    if cache is None or not keys:
+        return {}
+    try:
+        values = await cache.mget(list(keys.values()))
+    except RedisError as e:
+        logger.warning(f"Cart notification cache unavailable: {str(e)}")
+        return {}
+    return {
+        user_id: orjson.loads(value)
+        for user_id, value in zip(keys, values)
+        if value is not None
+    }
+
+async def _store_cached_notifications(cache, keys: Dict[int, str], payloads: Dict[int, dict]):
+    """Cache freshly built reminder payloads under their cart version"""
+    if cache is None or not payloads:
+        return
+    try:
+        async with cache.pipeline(transaction=False) as pipe:
+            for user_id, payload in payloads.items():
+                pipe.set(keys[user_id], orjson.dumps(payload), ex=CART_NOTIFICATION_CACHE_TTL)
+            await pipe.execute()
+    except RedisError as e:
+        logger.warning(f"Failed to cache cart notifications: {str(e)}")
+
 class CartEventHandler:
     # \"\"\"Handle cart-related events and notifications\"\"\"
     
     @staticmethod
-    async def handle_abandoned_cart(db: Session, user_id: int):
+    async def handle_abandoned_cart(
+        db: Session,
+        user_id: int,
+        user: Optional[User] = None,
+        cart_items: Optional[List[Row]] = None,
+        cart_total: Optional[int] = None,
+        notification_data: Optional[dict] = None
+    ):
         # \"\"\"Handle abandoned cart - send reminder email\"\"\"
+        # Callers that already loaded the user, cart items and total (or the
+        # cached reminder payload) pass them in
         try:
             # Get user
-            user = db.query(User).filter(User.id == user_id).first()
+            if user is None:
+                user = db.query(User).filter(User.id == user_id).first()
             if not user:
                 return
             
-            # Get cart items
-            cart_items = db.query(CartItem).filter(CartItem.user_id == user.clerk_id).all()
-            
-            if not cart_items:
-                return
-            
-            # Calculate cart total
-            cart_total = sum(item.product.price * item.quantity for item in cart_items)
-            
-            # Prepare notification data
-            notification_data = {
-                "cart_items": [
-                    {
-                        "name": item.product.name,
-                        "quantity": item.quantity,
-                        "price": item.product.price,
-                        "image": item.product.image_url
-                    }
-                    for item in cart_items
-                ],
-                "cart_total": cart_total,
-                "cart_url": "https://jasonjewels.com/cart"
-            }
+            if notification_data is None:
+                # Get cart items
+                if cart_items is None:
+                    cart_items = _cart_items_query(db).filter(CartItem.user_id == user.clerk_id).all()
+                
+                if not cart_items:
+                    return
+                
+                # Cart total is summed by the database
+                if cart_total is None:
+                    totals = _cart_totals_query(db).filter(CartItem.user_id == user.clerk_id).first()
+                    cart_total = totals[1] if totals else 0
+                
+                # Prepare notification data
+                notification_data = _build_notification_data(cart_items, cart_total)
             
             # Send notification
             result = await send_abandoned_cart_reminder(user.id, notification_data)
@@ -59,13 +131,80 @@ async def check_abandoned_carts(db: Session):
         # Find carts that haven't been updated in 24 hours
         cutoff_time = datetime.now() - timedelta(hours=24)
         
-        # This is a simplified example - you'd need to implement based on your cart tracking
-        abandoned_users = db.query(User).join(CartItem).filter(
-            CartItem.created_at < cutoff_time
-        ).distinct().all()
+        # Cart items carry the Clerk user id; a cart is abandoned when its newest
+        # item is older than the cutoff (cart items have no updated_at column).
+        # Newest item, item count and total quantity version the cart itself; the
+        # latest product edit and the priced total catch name, image and price changes.
+        cart_versions = {
+            clerk_id: (
+                f"{newest.timestamp():.0f}-{item_count}-{quantity}"
+                f"-{product_updated.timestamp() if product_updated else 0:.0f}-{total}"
+            )
+            for clerk_id, newest, item_count, quantity, product_updated, total in db.query(
+                CartItem.user_id,
+                func.max(CartItem.created_at),
+                func.count(CartItem.id),
+                func.coalesce(func.sum(CartItem.quantity), 0),
+                func.max(Product.updated_at),
+                func.coalesce(func.sum(Product.price * CartItem.quantity), 0)
+            )
+            .join(Product, CartItem.product_id == Product.id)
+            .group_by(CartItem.user_id)
+            .having(func.max(CartItem.created_at) < cutoff_time)
+            .all()
+        }
+        if not cart_versions:
+            logger.info("Checked 0 abandoned carts")
+            return
+        
+        abandoned_users = db.query(User).filter(User.clerk_id.in_(list(cart_versions))).all()
+        cache_keys = {
+            user.id: _cart_notification_key(user.id, cart_versions[user.clerk_id])
+            for user in abandoned_users
+        }
+        
+        cache = aioredis.from_url(REDIS_URL) if REDIS_URL else None
+        try:
+            # Unchanged carts reuse the payload built by an earlier sweep
+            payloads = await _load_cached_notifications(cache, cache_keys)
+            
+            stale_clerk_ids = [user.clerk_id for user in abandoned_users if user.id not in payloads]
+            if stale_clerk_ids:
+                items_by_user = defaultdict(list)
+                for item in _cart_items_query(db).filter(CartItem.user_id.in_(stale_clerk_ids)).all():
+                    items_by_user[item.user_id].append(item)
+                totals_by_user = dict(
+                    _cart_totals_query(db).filter(CartItem.user_id.in_(stale_clerk_ids)).all()
+                )
+                fresh_payloads = {
+                    user.id: _build_notification_data(
+                        items_by_user[user.clerk_id], totals_by_user.get(user.clerk_id, 0)
+                    )
+                    for user in abandoned_users
+                    if user.id not in payloads and items_by_user[user.clerk_id]
+                }
+                await _store_cached_notifications(cache, cache_keys, fresh_payloads)
+                payloads.update(fresh_payloads)
+        finally:
+            if cache is not None:
+                await cache.aclose()
+        
+        # Cap concurrent outbound reminder sends
+        semaphore = asyncio.Semaphore(ABANDONED_CART_CONCURRENCY)
+        
+        async def _remind(user: User):
+            async with semaphore:
+                await CartEventHandler.handle_abandoned_cart(
+                    db, user.id, user=user, notification_data=payloads[user.id]
+                )
         
-        for user in abandoned_users:
-            await CartEventHandler.handle_abandoned_cart(db, user.id)
+        results = await asyncio.gather(
+            *[_remind(user) for user in abandoned_users if user.id in payloads],
+            return_exceptions=True
+        )
+        failures = [result for result in results if isinstance(result, Exception)]
+        if failures:
+            logger.error(f"{len(failures)} abandoned cart reminders failed; first error: {failures[0]}")
         
         logger.info(f"Checked {len(abandoned_users)} abandoned carts")
         
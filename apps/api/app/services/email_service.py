@@ -1,59 +1,52 @@
 # app/services/email_service.py
 
+import asyncio
+import gzip
 import os
-import resend
-from typing import Dict, Any
+import re
+from datetime import datetime, timedelta, timezone
+import time
+import weakref
+import httpx
+import orjson
+from typing import Awaitable, Callable, ClassVar, Dict, Any, List, Optional, Set
 import logging
+from jinja2 import DictLoader, Environment
+from markupsafe import Markup
+from app.core.db import SessionLocal
+from app.models.pending_email import PendingEmail
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Configure Resend
-resend.api_key = os.getenv("RESEND_API_KEY")
+# Configuration is read once at import rather than on every send
+RESEND_API_KEY = os.getenv("RESEND_API_KEY")
+CONTACT_FROM_EMAIL = os.getenv("FROM_EMAIL", "contact@jasonjewels.com")
+ORDERS_FROM_EMAIL = os.getenv("FROM_EMAIL", "orders@jasonjewels.com")
+SUPPORT_EMAIL = os.getenv("SUPPORT_EMAIL", "support@jasonjewels.com")
+ADMIN_EMAIL = os.getenv("SUPPORT_EMAIL", "jonathan@jasonjewels.com")
 
-# STANDALONE FUNCTIONS (for your contact endpoints)
-async def send_email(to: str, subject: str, html_content: str, from_email: str = None):
-    """Base email sending function using Resend"""
-    try:
-        from_address = from_email or os.getenv("FROM_EMAIL", "contact@jasonjewels.com")
-        
-        params = {
-            "from": from_address,
-            "to": [to],
-            "subject": subject,
-            "html": html_content,
-        }
-        
-        email = resend.emails.send(params)
-        logger.info(f"Email sent successfully to {to}")
-        return email
-        
-    except Exception as e:
-        logger.error(f"Failed to send email to {to}: {e}")
-        raise
+# ============================================================================
+# EMAIL TEMPLATES (compiled once at import, rendered per email)
+# ============================================================================
 
-async def send_contact_inquiry_email(inquiry_data: Dict[str, Any], inquiry_id: int):
-    """Send contact inquiry confirmation and admin notification"""
-    
-    # Customer confirmation email
-    customer_template = f"""
+_TEMPLATE_SOURCES = {
+    "contact_customer": """
     <div style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
         <div style="background: linear-gradient(135deg, #D4AF37 0%, #FFD700 100%); padding: 30px; text-align: center;">
             <h1 style="color: white; margin: 0; font-size: 28px;">Thank You for Contacting Jason & Co.</h1>
         </div>
         
         <div style="padding: 30px; background: white;">
-            <h2 style="color: #333;">Hello {inquiry_data['name']},</h2>
+            <h2 style="color: #333;">Hello {{ name }},</h2>
             
             <p style="color: #666; line-height: 1.6;">We've received your inquiry and our team will respond within 2 hours during business hours.</p>
             
             <div style="background: #f8f9fa; padding: 20px; border-radius: 8px; margin: 20px 0; border-left: 4px solid #D4AF37;">
                 <h3 style="color: #333; margin-top: 0;">Your Inquiry Details:</h3>
-                <p><strong>Subject:</strong> {inquiry_data['subject']}</p>
-                <p><strong>Message:</strong> {inquiry_data['message']}</p>
-                {"<p><strong>Budget Range:</strong> " + inquiry_data.get('budget_range', '') + "</p>" if inquiry_data.get('budget_range') else ""}
-                <p><strong>Inquiry ID:</strong> #{inquiry_id}</p>
+                <p><strong>Subject:</strong> {{ subject }}</p>
+                <p><strong>Message:</strong> {{ message }}</p>
+                {% if budget_range %}<p><strong>Budget Range:</strong> {{ budget_range }}</p>{% endif %}
+                <p><strong>Inquiry ID:</strong> #{{ inquiry_id }}</p>
             </div>
             
             <p style="color: #666;">For immediate assistance, call us at <strong style="color: #D4AF37;">(212) 555-GOLD</strong></p>
@@ -65,82 +58,47 @@ async def send_contact_inquiry_email(inquiry_data: Dict[str, Any], inquiry_id: i
             <p>Jason & Co. | Where Ambition Meets Artistry</p>
         </div>
     </div>
-    """
-    
-    # Admin notification email
-    admin_template = f"""
+    """,
+    "contact_admin": """
     <div style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
-        <h2 style="color: #D4AF37;">New Contact Inquiry #{inquiry_id}</h2>
+        <h2 style="color: #D4AF37;">New Contact Inquiry #{{ inquiry_id }}</h2>
         
         <div style="background: #f8f9fa; padding: 20px; border-radius: 8px; margin: 20px 0;">
-            <p><strong>Name:</strong> {inquiry_data['name']}</p>
-            <p><strong>Email:</strong> {inquiry_data['email']}</p>
-            <p><strong>Phone:</strong> {inquiry_data.get('phone', 'Not provided')}</p>
-            <p><strong>Company:</strong> {inquiry_data.get('company', 'Not provided')}</p>
-            <p><strong>Subject:</strong> {inquiry_data['subject']}</p>
-            <p><strong>Budget Range:</strong> {inquiry_data.get('budget_range', 'Not specified')}</p>
-            <p><strong>Timeline:</strong> {inquiry_data.get('timeline', 'Not specified')}</p>
-            <p><strong>Preferred Location:</strong> {inquiry_data.get('preferred_location', 'Not specified')}</p>
+            <p><strong>Name:</strong> {{ name }}</p>
+            <p><strong>Email:</strong> {{ email }}</p>
+            <p><strong>Phone:</strong> {{ phone }}</p>
+            <p><strong>Company:</strong> {{ company }}</p>
+            <p><strong>Subject:</strong> {{ subject }}</p>
+            <p><strong>Budget Range:</strong> {{ budget_label }}</p>
+            <p><strong>Timeline:</strong> {{ timeline }}</p>
+            <p><strong>Preferred Location:</strong> {{ preferred_location }}</p>
             
             <h3>Message:</h3>
-            <p style="background: white; padding: 15px; border-radius: 5px;">{inquiry_data['message']}</p>
+            <p style="background: white; padding: 15px; border-radius: 5px;">{{ message }}</p>
             
-            <p><strong>Preferred Contact Methods:</strong> {', '.join(inquiry_data.get('preferred_contact', []))}</p>
+            <p><strong>Preferred Contact Methods:</strong> {{ preferred_contact|join(', ') }}</p>
         </div>
         
         <p><strong>Response Required:</strong> Within 2 hours during business hours</p>
     </div>
-    """
-    
-    try:
-        # Send customer confirmation
-        await send_email(
-            to=inquiry_data['email'],
-            subject="Your Jason & Co. Inquiry Received",
-            html_content=customer_template
-        )
-        
-        # Send admin notification
-        admin_email = os.getenv('SUPPORT_EMAIL', 'jonathan@jasonjewels.com')
-        await send_email(
-            to=admin_email,
-            subject=f"New Contact Inquiry: {inquiry_data['subject']} - #{inquiry_id}",
-            html_content=admin_template
-        )
-        
-        logger.info(f"Contact inquiry emails sent for #{inquiry_id}")
-        
-    except Exception as e:
-        logger.error(f"Failed to send contact inquiry emails: {e}")
-
-async def send_consultation_booking_email(booking_data: Dict[str, Any], booking_id: int):
-    """Send consultation booking confirmation"""
-    
-    consultation_types = {
-        'virtual': 'Virtual Consultation',
-        'in-person': 'In-Person Atelier Visit', 
-        'premium': 'Premium Design Session'
-    }
-    
-    consultation_name = consultation_types.get(booking_data['consultation_type'], booking_data['consultation_type'])
-    
-    customer_template = f"""
+    """,
+    "consultation_customer": """
     <div style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
         <div style="background: linear-gradient(135deg, #D4AF37 0%, #FFD700 100%); padding: 30px; text-align: center;">
             <h1 style="color: white; margin: 0; font-size: 28px;">Consultation Request Received</h1>
         </div>
         
         <div style="padding: 30px; background: white;">
-            <h2 style="color: #333;">Hello {booking_data['name']},</h2>
+            <h2 style="color: #333;">Hello {{ name }},</h2>
             
-            <p style="color: #666; line-height: 1.6;">Your {consultation_name} request has been received. We'll confirm your appointment within 24 hours.</p>
+            <p style="color: #666; line-height: 1.6;">Your {{ consultation_name }} request has been received. We'll confirm your appointment within 24 hours.</p>
             
             <div style="background: #f8f9fa; padding: 20px; border-radius: 8px; margin: 20px 0; border-left: 4px solid #D4AF37;">
                 <h3 style="color: #333; margin-top: 0;">Consultation Details:</h3>
-                <p><strong>Type:</strong> {consultation_name}</p>
-                <p><strong>Booking ID:</strong> #{booking_id}</p>
-                {"<p><strong>Preferred Date:</strong> " + str(booking_data.get('preferred_date', 'To be scheduled')) + "</p>" if booking_data.get('preferred_date') else "<p><strong>Scheduling:</strong> To be arranged</p>"}
-                {"<p><strong>Budget Range:</strong> " + booking_data.get('budget_range', '') + "</p>" if booking_data.get('budget_range') else ""}
+                <p><strong>Type:</strong> {{ consultation_name }}</p>
+                <p><strong>Booking ID:</strong> #{{ booking_id }}</p>
+                {% if preferred_date %}<p><strong>Preferred Date:</strong> {{ preferred_date }}</p>{% else %}<p><strong>Scheduling:</strong> To be arranged</p>{% endif %}
+                {% if budget_range %}<p><strong>Budget Range:</strong> {{ budget_range }}</p>{% endif %}
             </div>
             
             <h3 style="color: #333;">What to Expect:</h3>
@@ -160,57 +118,32 @@ async def send_consultation_booking_email(booking_data: Dict[str, Any], booking_
             <p>Jason & Co. | Where Ambition Meets Artistry</p>
         </div>
     </div>
-    """
-    
-    try:
-        await send_email(
-            to=booking_data['email'],
-            subject=f"Jason & Co. Consultation Request Confirmed - #{booking_id}",
-            html_content=customer_template
-        )
-        
-        # Send admin notification
-        admin_email = os.getenv('SUPPORT_EMAIL', 'jonathan@jasonjewels.com')
-        admin_template = f"""
-        <h2>New Consultation Booking #{booking_id}</h2>
-        <p><strong>Type:</strong> {consultation_name}</p>
-        <p><strong>Client:</strong> {booking_data['name']} ({booking_data['email']})</p>
-        <p><strong>Phone:</strong> {booking_data.get('phone', 'Not provided')}</p>
-        <p><strong>Project:</strong> {booking_data.get('project_description', 'Not provided')}</p>
-        <p><strong>Budget:</strong> {booking_data.get('budget_range', 'Not specified')}</p>
-        """
-        
-        await send_email(
-            to=admin_email,
-            subject=f"New Consultation Booking: {consultation_name} - #{booking_id}",
-            html_content=admin_template
-        )
-        
-        logger.info(f"Consultation booking emails sent for #{booking_id}")
-        
-    except Exception as e:
-        logger.error(f"Failed to send consultation booking emails: {e}")
-
-async def send_consultation_confirmation_email(email: str, booking_data: Dict[str, Any]):
-    """Send consultation confirmation when admin confirms booking"""
-    
-    confirmation_template = f"""
+    """,
+    "consultation_admin": """
+        <h2>New Consultation Booking #{{ booking_id }}</h2>
+        <p><strong>Type:</strong> {{ consultation_name }}</p>
+        <p><strong>Client:</strong> {{ name }} ({{ email }})</p>
+        <p><strong>Phone:</strong> {{ phone }}</p>
+        <p><strong>Project:</strong> {{ project_description }}</p>
+        <p><strong>Budget:</strong> {{ budget_label }}</p>
+    """,
+    "consultation_confirmation": """
     <div style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
         <div style="background: linear-gradient(135deg, #D4AF37 0%, #FFD700 100%); padding: 30px; text-align: center;">
             <h1 style="color: white; margin: 0; font-size: 28px;">Consultation Confirmed!</h1>
         </div>
         
         <div style="padding: 30px; background: white;">
-            <h2 style="color: #333;">Hello {booking_data['name']},</h2>
+            <h2 style="color: #333;">Hello {{ booking['name'] }},</h2>
             
             <p style="color: #666; line-height: 1.6;">Great news! Your consultation has been confirmed.</p>
             
             <div style="background: #e8f5e8; padding: 20px; border-radius: 8px; margin: 20px 0; border-left: 4px solid #2d5a2d;">
                 <h3 style="color: #2d5a2d; margin-top: 0;">Confirmed Details:</h3>
-                <p><strong>Type:</strong> {booking_data['consultation_type']}</p>
-                <p><strong>Date & Time:</strong> {booking_data.get('confirmed_date', 'TBD')}</p>
-                {"<p><strong>Meeting Link:</strong> <a href='" + booking_data.get('meeting_link', '') + "' style='color: #D4AF37;'>Join Meeting</a></p>" if booking_data.get('meeting_link') else ""}
-                <p><strong>Booking ID:</strong> #{booking_data['booking_id']}</p>
+                <p><strong>Type:</strong> {{ booking['consultation_type'] }}</p>
+                <p><strong>Date & Time:</strong> {{ booking.get('confirmed_date', 'TBD') }}</p>
+                {% if booking.get('meeting_link') %}<p><strong>Meeting Link:</strong> <a href='{{ booking['meeting_link'] }}' style='color: #D4AF37;'>Join Meeting</a></p>{% endif %}
+                <p><strong>Booking ID:</strong> #{{ booking['booking_id'] }}</p>
             </div>
             
             <h3 style="color: #333;">Preparation:</h3>
@@ -226,53 +159,15 @@ async def send_consultation_confirmation_email(email: str, booking_data: Dict[st
             <p style="color: #333;">Looking forward to our meeting,<br><strong>The Jason & Co. Design Team</strong></p>
         </div>
     </div>
-    """
-    
-    try:
-        await send_email(
-            to=email,
-            subject="Consultation Confirmed - Jason & Co.",
-            html_content=confirmation_template
-        )
-        logger.info(f"Consultation confirmation sent to {email}")
-    except Exception as e:
-        logger.error(f"Failed to send consultation confirmation: {e}")
-
-# ============================================================================
-# EMAIL SERVICE CLASS (for your existing notification system)
-# ============================================================================
-
-class EmailService:
-    """Enhanced email service with support for all notification types"""
-    
-    def __init__(self):
-        self.from_email = os.getenv("FROM_EMAIL", "orders@jasonjewels.com")
-        self.support_email = os.getenv("SUPPORT_EMAIL", "support@jasonjewels.com")
-        self.api_key = os.getenv("RESEND_API_KEY")
-        
-        if not self.api_key:
-            logger.warning("RESEND_API_KEY not set - email service will not work")
-    
-    def _get_base_template(self, title: str, content: str, cta_text: str = None, cta_link: str = None) -> str:
-        """Base email template for consistent branding"""
-        
-        cta_section = ""
-        if cta_text and cta_link:
-            cta_section = f"""
-            <div style="text-align: center; margin: 30px 0;">
-                <a href="{cta_link}" style="background: #D4AF37; color: #000; padding: 15px 30px; text-decoration: none; border-radius: 5px; font-weight: bold; display: inline-block; letter-spacing: 1px; text-transform: uppercase;">
-                    {cta_text}
-                </a>
-            </div>
-            """
-        
-        return f"""
+    """,
+    "base": """
         <!DOCTYPE html>
         <html>
         <head>
             <meta charset="utf-8">
             <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            <title>{title} | Jason & Co.</title>
+            <title>{{ title }} | Jason & Co.</title>
+            {% block styles %}{% endblock %}
         </head>
         <body style="font-family: 'Arial', sans-serif; line-height: 1.6; color: #333; max-width: 600px; margin: 0 auto; padding: 20px; background: #f9f9f9;">
             
@@ -288,14 +183,26 @@ class EmailService:
             
             <!-- Content -->
             <div style="background: #fff; padding: 30px; border-radius: 10px; box-shadow: 0 5px 15px rgba(0,0,0,0.1);">
-                <h2 style="color: #D4AF37; margin: 0 0 20px 0; font-size: 24px; text-align: center;">{title}</h2>
-                {content}
-                {cta_section}
+                <h2 style="color: #D4AF37; margin: 0 0 20px 0; font-size: 24px; text-align: center;">{{ title }}</h2>
+                {% block content %}{{ content }}{% endblock %}
+                {% if cta_text and cta_link %}
+                <div style="text-align: center; margin: 30px 0;">
+                    <a href="{{ cta_link }}" style="background: #D4AF37; color: #000; padding: 15px 30px; text-decoration: none; border-radius: 5px; font-weight: bold; display: inline-block; letter-spacing: 1px; text-transform: uppercase;">
+                        {{ cta_text }}
+                    </a>
+                </div>
+                {% endif %}
             </div>
             
             <!-- Footer -->
+            {{ footer }}
+            
+        </body>
+        </html>
+        """,
+    "footer": """
             <div style="text-align: center; padding: 30px 20px 20px 20px; color: #666; font-size: 14px;">
-                <p>Questions? Contact us at <a href="mailto:{self.support_email}" style="color: #D4AF37; text-decoration: none;">{self.support_email}</a></p>
+                <p>Questions? Contact us at <a href="mailto:{{ support_email }}" style="color: #D4AF37; text-decoration: none;">{{ support_email }}</a></p>
                 <p style="margin-top: 20px; font-size: 12px; color: #999;">
                     © 2025 Jason & Co. | Designed without Limits
                 </p>
@@ -303,83 +210,43 @@ class EmailService:
                     You're receiving this email because you have an account with Jason & Co.
                 </p>
             </div>
-            
-        </body>
-        </html>
-        """
-
-    async def send_notification_email(self, template_name: str, email_data: Dict[str, Any]) -> Dict[str, Any]:
-        """
-        Send notification email using specified template.
-        This is called by the NotificationService.
-        """
-        try:
-            # Get the template function
-            template_method = getattr(self, f"_template_{template_name}", None)
-            if not template_method:
-                logger.error(f"Template {template_name} not found")
-                return {"error": f"Template {template_name} not found"}
-            
-            # Generate email content
-            email_content = template_method(email_data)
-            
-            # Send email
-            response = resend.Emails.send(email_content)
-            
-            logger.info(f"Email sent successfully: {template_name} to {email_data['to']}")
-            return {"success": True, "response": response}
-            
-        except Exception as e:
-            logger.error(f"Failed to send email {template_name}: {str(e)}")
-            return {"error": str(e)}
-
-    def _template_order_confirmation(self, data: Dict[str, Any]) -> Dict[str, Any]:
-        """Order confirmation email template - Updated for prices in cents"""
-        customer_name = data.get("user_name", "Valued Customer")
-        order_number = data.get("order_number", "N/A")
-        total_cents = data.get("total", 0)  # Total is in cents
-        items = data.get("items", [])
-        
-        # Convert total from cents to dollars for display
-        total_dollars = total_cents / 100
-        
-        # Build items HTML
-        items_html = ""
-        for item in items:
-            # All price fields are in cents, convert to dollars for display
-            unit_price_dollars = item["unit_price"] / 100
-            item_total_dollars = (item["unit_price"] * item["quantity"]) / 100
-            
-            items_html += f"""
-            <tr>
-                <td style="padding: 12px; border-bottom: 1px solid #eee;">
-                    <strong>{item["name"]}</strong><br>
-                    <small style="color: #666;">Qty: {item["quantity"]} × ${unit_price_dollars:.2f}</small>
-                </td>
-                <td style="padding: 12px; border-bottom: 1px solid #eee; text-align: right;">
-                    <strong>${item_total_dollars:.2f}</strong>
-                </td>
-            </tr>
-            """
-        
-        content = f"""
+        """,
+    "order_confirmation": """{% extends "base" %}
+        {% block styles %}
+        <style>
+            .item-cell { padding: 12px; border-bottom: 1px solid #eee; }
+            .item-total { text-align: right; }
+            .item-meta { color: #666; }
+        </style>
+        {% endblock %}
+        {% block content %}
         <div style="text-align: center; margin-bottom: 30px;">
             <p style="font-size: 16px; margin: 10px 0; color: #666;">
-                Thank you for your order, {customer_name}!
+                Thank you for your order, {{ customer_name }}!
             </p>
             <div style="background: #f8f8f8; padding: 15px; border-radius: 8px; margin: 20px 0;">
-                <strong style="color: #333; font-size: 18px;">Order #{order_number}</strong>
+                <strong style="color: #333; font-size: 18px;">Order #{{ order_number }}</strong>
             </div>
         </div>
         
         <div style="margin-bottom: 30px;">
             <h3 style="color: #333; border-bottom: 2px solid #D4AF37; padding-bottom: 10px;">Your Order</h3>
             <table style="width: 100%; border-collapse: collapse;">
-                {items_html}
+                {% for item in items %}
+                <tr>
+                    <td class="item-cell">
+                        <strong>{{ item['name'] }}</strong><br>
+                        <small class="item-meta">Qty: {{ item['quantity'] }} × ${{ '%.2f'|format(item['unit_price'] / 100) }}</small>
+                    </td>
+                    <td class="item-cell item-total">
+                        <strong>${{ '%.2f'|format(item['unit_price'] * item['quantity'] / 100) }}</strong>
+                    </td>
+                </tr>
+                {% endfor %}
                 <tr style="background: #f8f8f8;">
                     <td style="padding: 15px; font-weight: bold; font-size: 18px;">Total</td>
                     <td style="padding: 15px; text-align: right; font-weight: bold; font-size: 18px; color: #D4AF37;">
-                        ${total_dollars:.2f}
+                        ${{ '%.2f'|format(total_cents / 100) }}
                     </td>
                 </tr>
             </table>
@@ -391,62 +258,531 @@ class EmailService:
             <p style="margin: 10px 0;">📦 You'll receive shipping confirmation within 1-2 business days</p>
             <p style="margin: 10px 0;">🚚 Estimated delivery: 3-5 business days</p>
         </div>
+        {% endblock %}""",
+}
+
+_HTML_COMMENT_RE = re.compile(r"<!--.*?-->", re.S)
+_BETWEEN_TAGS_RE = re.compile(r">\s*\n\s*<")
+_LINE_BREAK_RE = re.compile(r"\s*\n\s*")
+
+def _minify_html(source: str) -> str:
+    """Drop comments and source indentation; whitespace within a line is kept"""
+    source = _HTML_COMMENT_RE.sub("", source)
+    source = _BETWEEN_TAGS_RE.sub("><", source)
+    return _LINE_BREAK_RE.sub(" ", source).strip()
+
+# Templates never change at runtime, so minify and compile them all up front and never reload
+_template_env = Environment(
+    loader=DictLoader({name: _minify_html(source) for name, source in _TEMPLATE_SOURCES.items()}),
+    autoescape=True,
+    auto_reload=False,
+    cache_size=-1,
+)
+TEMPLATES = {name: _template_env.get_template(name) for name in _TEMPLATE_SOURCES}
+
+# Resend enforces a per-second request quota (HTTP 429 when exceeded), so cap
+# in-flight sends and pace them, backing off exponentially on 429s
+RESEND_MAX_INFLIGHT = int(os.getenv("RESEND_MAX_INFLIGHT", "4"))
+RESEND_RPS = float(os.getenv("RESEND_RPS", "2"))
+RESEND_MAX_ATTEMPTS = 3
+RESEND_BACKOFF_BASE = 0.5
+RESEND_MAX_BACKOFF = 8.0
+
+class _RateLimiter:
+    """Token bucket of size one: enforces a minimum interval between requests"""
+    
+    def __init__(self, rate_per_second: float):
+        self.min_interval = 1.0 / rate_per_second
+        self.next_slot = 0.0
+    
+    async def acquire(self):
+        # Reserve the next slot before sleeping so concurrent callers queue up in order
+        now = time.monotonic()
+        slot = max(now, self.next_slot)
+        self.next_slot = slot + self.min_interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+RESEND_API_URL = "https://api.resend.com"
+RESEND_TIMEOUT = 10.0
+RESEND_MAX_CONNECTIONS = 20
+
+# Optional gzip request bodies (level 1: fast, still shrinks markup several times).
+# Disabled for the rest of the process if the API rejects a compressed body.
+RESEND_GZIP = os.getenv("RESEND_GZIP", "false").lower() == "true"
+RESEND_GZIP_MIN_BYTES = 1024
+_gzip_rejected = False
+
+class _LoopResources:
+    """Send semaphore and pooled keep-alive HTTP/2 client for one event loop"""
+    
+    def __init__(self):
+        self.semaphore = asyncio.Semaphore(RESEND_MAX_INFLIGHT)
+        self.client = httpx.AsyncClient(
+            base_url=RESEND_API_URL,
+            http2=True,
+            timeout=RESEND_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=RESEND_MAX_CONNECTIONS,
+                max_keepalive_connections=RESEND_MAX_CONNECTIONS
+            ),
+            headers={
+                "Authorization": f"Bearer {RESEND_API_KEY}",
+                "Content-Type": "application/json",
+            },
+        )
+
+# Celery tasks run each job in a fresh event loop, and neither semaphores nor
+# pooled connections can be shared across loops, so keep one set per loop
+_loop_resources: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopResources]" = weakref.WeakKeyDictionary()
+_rate_limiter = _RateLimiter(RESEND_RPS)
+
+def _resources() -> _LoopResources:
+    loop = asyncio.get_running_loop()
+    resources = _loop_resources.get(loop)
+    if resources is None:
+        resources = _loop_resources[loop] = _LoopResources()
+    return resources
+
+async def close_email_client():
+    """Close the pooled Resend client for the running event loop"""
+    resources = _loop_resources.pop(asyncio.get_running_loop(), None)
+    if resources is not None:
+        await resources.client.aclose()
+
+def _rejects_gzip(response: httpx.Response) -> bool:
+    """True when Resend refused the request because of its gzip Content-Encoding"""
+    if response.status_code == 415:
+        return True
+    if response.status_code != 400:
+        return False
+    text = response.text.lower()
+    return "encoding" in text or "gzip" in text
+
+async def _call_resend(path: str, payload):
+    """POST to the Resend API within the concurrency cap and rate limit"""
+    global _gzip_rejected
+    resources = _resources()
+    # Serialize once with orjson; retries resend the same bytes
+    body = orjson.dumps(payload)
+    headers = None
+    compressed = RESEND_GZIP and not _gzip_rejected and len(body) >= RESEND_GZIP_MIN_BYTES
+    if compressed:
+        plain_body, body = body, gzip.compress(body, compresslevel=1)
+        headers = {"Content-Encoding": "gzip"}
+    async with resources.semaphore:
+        for attempt in range(RESEND_MAX_ATTEMPTS):
+            await _rate_limiter.acquire()
+            response = await resources.client.post(path, content=body, headers=headers)
+            if compressed and _rejects_gzip(response):
+                logger.warning("Resend rejected a gzip body (%s); sending uncompressed", response.status_code)
+                _gzip_rejected = True
+                compressed, body, headers = False, plain_body, None
+                await _rate_limiter.acquire()
+                response = await resources.client.post(path, content=body)
+            if response.status_code != 429 or attempt == RESEND_MAX_ATTEMPTS - 1:
+                response.raise_for_status()
+                return orjson.loads(response.content)
+            backoff = min(RESEND_MAX_BACKOFF, RESEND_BACKOFF_BASE * 2 ** attempt)
+            logger.warning("Resend rate limit hit, retrying in %.1fs", backoff)
+            await asyncio.sleep(backoff)
+
+# Display names for consultation types
+CONSULTATION_TYPES = {
+    'virtual': 'Virtual Consultation',
+    'in-person': 'In-Person Atelier Visit',
+    'premium': 'Premium Design Session'
+}
+
+# Transient send failures are persisted to pending_emails and retried with
+# exponential backoff by a background worker (at-least-once delivery)
+EMAIL_RETRY_MAX_ATTEMPTS = 5
+EMAIL_RETRY_MAX_BACKOFF = 600
+EMAIL_RETRY_POLL_SECONDS = float(os.getenv("EMAIL_RETRY_POLL_SECONDS", "30"))
+EMAIL_RETRY_BATCH_SIZE = 50
+
+def _is_retryable(error: Exception) -> bool:
+    """Rate limiting, server errors and connection failures are worth retrying"""
+    if isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+        return status == 429 or status >= 500
+    return isinstance(error, httpx.TransportError)
+
+def _retry_delay(attempts: int) -> timedelta:
+    return timedelta(seconds=min(EMAIL_RETRY_MAX_BACKOFF, 2 ** attempts))
+
+def _enqueue_emails(messages: List[Dict[str, Any]], error: Exception):
+    next_retry_at = datetime.now(timezone.utc) + _retry_delay(1)
+    with SessionLocal.begin() as db:
+        db.add_all([
+            PendingEmail(
+                from_email=message["from"],
+                to_email=message["to"][0],
+                subject=message["subject"],
+                html=message["html"],
+                attempts=1,
+                next_retry_at=next_retry_at,
+                last_error=str(error),
+            )
+            for message in messages
+        ])
+
+async def queue_failed_emails(messages: List[Dict[str, Any]], error: Exception) -> bool:
+    """Persist messages whose send failed transiently; returns True if queued"""
+    if not _is_retryable(error):
+        return False
+    try:
+        await asyncio.to_thread(_enqueue_emails, messages, error)
+        logger.warning("Queued %d emails for retry after send failure: %s", len(messages), error)
+        return True
+    except Exception as e:
+        logger.error("Failed to queue emails for retry: %s", e)
+        return False
+
+def _claim_due_emails() -> List[PendingEmail]:
+    # Push claimed rows' next_retry_at forward so concurrent workers skip them
+    now = datetime.now(timezone.utc)
+    with SessionLocal.begin() as db:
+        due = (
+            db.query(PendingEmail)
+            .filter(PendingEmail.next_retry_at <= now)
+            .order_by(PendingEmail.next_retry_at)
+            .limit(EMAIL_RETRY_BATCH_SIZE)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+        for pending in due:
+            pending.next_retry_at = now + timedelta(seconds=EMAIL_RETRY_MAX_BACKOFF)
+        db.flush()
+        db.expunge_all()
+    return due
+
+def _record_retry_results(sent_ids: List[int], failures: List[tuple]):
+    with SessionLocal.begin() as db:
+        if sent_ids:
+            db.query(PendingEmail).filter(PendingEmail.id.in_(sent_ids)).delete(synchronize_session=False)
+        for pending, error in failures:
+            attempts = pending.attempts + 1
+            if attempts >= EMAIL_RETRY_MAX_ATTEMPTS or not _is_retryable(error):
+                logger.error(
+                    "Giving up on email to %s after %d attempts: %s", pending.to_email, attempts, error
+                )
+                db.query(PendingEmail).filter(PendingEmail.id == pending.id).delete(synchronize_session=False)
+                continue
+            db.query(PendingEmail).filter(PendingEmail.id == pending.id).update({
+                PendingEmail.attempts: attempts,
+                PendingEmail.next_retry_at: datetime.now(timezone.utc) + _retry_delay(attempts),
+                PendingEmail.last_error: str(error),
+            }, synchronize_session=False)
+
+async def drain_email_queue() -> int:
+    """Retry every due pending email once; returns the number delivered"""
+    due = await asyncio.to_thread(_claim_due_emails)
+    if not due:
+        return 0
+    
+    results = await asyncio.gather(
+        *[
+            _call_resend("/emails", _email_params(p.to_email, p.subject, p.html, p.from_email))
+            for p in due
+        ],
+        return_exceptions=True
+    )
+    sent_ids = [p.id for p, result in zip(due, results) if not isinstance(result, Exception)]
+    failures = [(p, result) for p, result in zip(due, results) if isinstance(result, Exception)]
+    await asyncio.to_thread(_record_retry_results, sent_ids, failures)
+    
+    logger.info("Email retry queue: %d delivered, %d failed", len(sent_ids), len(failures))
+    return len(sent_ids)
+
+async def _drain_queue_forever():
+    while True:
+        try:
+            await drain_email_queue()
+        except Exception as e:
+            logger.error("Email retry worker error: %s", e)
+        await asyncio.sleep(EMAIL_RETRY_POLL_SECONDS)
+
+_retry_worker: Optional[asyncio.Task] = None
+
+def start_email_retry_worker():
+    """Start the background task that drains the email retry queue"""
+    global _retry_worker
+    if _retry_worker is None or _retry_worker.done():
+        _retry_worker = asyncio.create_task(_drain_queue_forever())
+
+async def stop_email_retry_worker():
+    global _retry_worker
+    if _retry_worker is not None:
+        _retry_worker.cancel()
+        try:
+            await _retry_worker
+        except asyncio.CancelledError:
+            pass
+        _retry_worker = None
+
+# Strong references to in-flight fire-and-forget sends so they aren't garbage collected
+_pending: Set[asyncio.Task] = set()
+
+def dispatch_email(send: Awaitable) -> asyncio.Task:
+    """Run an email coroutine in the background without blocking the caller"""
+    task = asyncio.create_task(send)
+    _pending.add(task)
+    task.add_done_callback(_pending.discard)
+    return task
+
+# STANDALONE FUNCTIONS (for your contact endpoints)
+_HEADER_BREAK_RE = re.compile(r"[\r\n]+")
+
+def _header_safe(value: str) -> str:
+    """Collapse line breaks so user input can't inject extra headers via the subject"""
+    return _HEADER_BREAK_RE.sub(" ", value)
+
+def _email_params(to: str, subject: str, html_content: str, from_email: str = None) -> Dict[str, Any]:
+    """Resend send parameters for a single message"""
+    return {
+        "from": from_email or CONTACT_FROM_EMAIL,
+        "to": [to],
+        "subject": _header_safe(subject),
+        "html": html_content,
+    }
+
+async def send_email(to: str, subject: str, html_content: str, from_email: str = None):
+    """Base email sending function using Resend"""
+    try:
+        params = _email_params(to, subject, html_content, from_email)
+        
+        email = await _call_resend("/emails", params)
+        logger.info("Email sent successfully to %s", to)
+        return email
+        
+    except Exception as e:
+        logger.error("Failed to send email to %s: %s", to, e)
+        raise
+
+async def send_email_batch(messages: List[Dict[str, Any]]):
+    """Send independent messages (built with _email_params) in one Resend batch request"""
+    try:
+        response = await _call_resend("/emails/batch", messages)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Batch of %d emails sent to %s", len(messages), ", ".join(m["to"][0] for m in messages))
+        return response
+        
+    except Exception as e:
+        logger.error("Failed to send email batch: %s", e)
+        raise
+
+async def send_contact_inquiry_email(inquiry_data: Dict[str, Any], inquiry_id: int):
+    """Send contact inquiry confirmation and admin notification"""
+    
+    # Read each field once; both templates render from the same context
+    subject = inquiry_data['subject']
+    context = {
+        "inquiry_id": inquiry_id,
+        "name": inquiry_data['name'],
+        "email": inquiry_data['email'],
+        "subject": subject,
+        "message": inquiry_data['message'],
+        "budget_range": inquiry_data.get('budget_range'),
+        "budget_label": inquiry_data.get('budget_range', 'Not specified'),
+        "phone": inquiry_data.get('phone', 'Not provided'),
+        "company": inquiry_data.get('company', 'Not provided'),
+        "timeline": inquiry_data.get('timeline', 'Not specified'),
+        "preferred_location": inquiry_data.get('preferred_location', 'Not specified'),
+        "preferred_contact": inquiry_data.get('preferred_contact', []),
+    }
+    customer_template = TEMPLATES["contact_customer"].render(context)
+    admin_template = TEMPLATES["contact_admin"].render(context)
+    
+    # Customer confirmation and admin notification go out in one request
+    messages = [
+        _email_params(
+            to=context["email"],
+            subject="Your Jason & Co. Inquiry Received",
+            html_content=customer_template
+        ),
+        _email_params(
+            to=ADMIN_EMAIL,
+            subject=f"New Contact Inquiry: {subject} - #{inquiry_id}",
+            html_content=admin_template
+        ),
+    ]
+    try:
+        await send_email_batch(messages)
+        logger.info("Contact inquiry emails sent for #%s", inquiry_id)
+        
+    except Exception as e:
+        logger.error("Failed to send contact inquiry emails: %s", e)
+        await queue_failed_emails(messages, e)
+
+async def send_consultation_booking_email(booking_data: Dict[str, Any], booking_id: int):
+    """Send consultation booking confirmation"""
+    
+    consultation_type = booking_data['consultation_type']
+    consultation_name = CONSULTATION_TYPES.get(consultation_type, consultation_type)
+    
+    # Read each field once; both templates render from the same context
+    context = {
+        "booking_id": booking_id,
+        "consultation_name": consultation_name,
+        "name": booking_data['name'],
+        "email": booking_data['email'],
+        "preferred_date": booking_data.get('preferred_date'),
+        "budget_range": booking_data.get('budget_range'),
+        "budget_label": booking_data.get('budget_range', 'Not specified'),
+        "phone": booking_data.get('phone', 'Not provided'),
+        "project_description": booking_data.get('project_description', 'Not provided'),
+    }
+    customer_template = TEMPLATES["consultation_customer"].render(context)
+    admin_template = TEMPLATES["consultation_admin"].render(context)
+    
+    # Customer confirmation and admin notification go out in one request
+    messages = [
+        _email_params(
+            to=context["email"],
+            subject=f"Jason & Co. Consultation Request Confirmed - #{booking_id}",
+            html_content=customer_template
+        ),
+        _email_params(
+            to=ADMIN_EMAIL,
+            subject=f"New Consultation Booking: {consultation_name} - #{booking_id}",
+            html_content=admin_template
+        ),
+    ]
+    try:
+        await send_email_batch(messages)
+        logger.info("Consultation booking emails sent for #%s", booking_id)
+        
+    except Exception as e:
+        logger.error("Failed to send consultation booking emails: %s", e)
+        await queue_failed_emails(messages, e)
+
+async def send_consultation_confirmation_email(email: str, booking_data: Dict[str, Any]):
+    """Send consultation confirmation when admin confirms booking"""
+    
+    confirmation_template = TEMPLATES["consultation_confirmation"].render(booking=booking_data)
+    
+    subject = "Consultation Confirmed - Jason & Co."
+    try:
+        await send_email(
+            to=email,
+            subject=subject,
+            html_content=confirmation_template
+        )
+        logger.info("Consultation confirmation sent to %s", email)
+    except Exception as e:
+        logger.error("Failed to send consultation confirmation: %s", e)
+        await queue_failed_emails([_email_params(email, subject, confirmation_template)], e)
+
+# ============================================================================
+# EMAIL SERVICE CLASS (for your existing notification system)
+# ============================================================================
+
+class EmailService:
+    """Enhanced email service with support for all notification types"""
+    
+    # Template name -> builder, used by send_notification_email (filled in below the class)
+    _TEMPLATES: ClassVar[Dict[str, Callable[["EmailService", Dict[str, Any]], Dict[str, Any]]]]
+    
+    def __init__(self):
+        self.from_email = ORDERS_FROM_EMAIL
+        self.support_email = SUPPORT_EMAIL
+        self.api_key = RESEND_API_KEY
+        
+        # The footer only depends on support_email, so render it once per instance
+        self._footer = Markup(TEMPLATES["footer"].render(support_email=self.support_email))
+        
+        if not self.api_key:
+            logger.warning("RESEND_API_KEY not set - email service will not work")
+    
+    async def close(self):
+        """Release the pooled HTTP connections used for sending"""
+        await close_email_client()
+    
+    def _get_base_template(self, title: str, content: str, cta_text: str = None, cta_link: str = None) -> str:
+        """Base email template for consistent branding"""
+        # content is HTML built from our own templates, so it is not escaped again
+        return TEMPLATES["base"].render(
+            title=title,
+            content=Markup(content),
+            cta_text=cta_text,
+            cta_link=cta_link,
+            footer=self._footer
+        )
+
+    async def send_notification_email(self, template_name: str, email_data: Dict[str, Any]) -> Dict[str, Any]:
         """
+        Send notification email using specified template.
+        This is called by the NotificationService.
+        """
+        try:
+            # Get the template function
+            template_method = self._TEMPLATES.get(template_name)
+            if template_method is None:
+                logger.error("Template %s not found", template_name)
+                return {"error": f"Template {template_name} not found"}
+            
+            # Generate email content
+            email_content = template_method(self, email_data)
+            
+            # Send email
+            response = await _call_resend("/emails", email_content)
+            
+            logger.info("Email sent successfully: %s to %s", template_name, email_data['to'])
+            return {"success": True, "response": response}
+            
+        except Exception as e:
+            logger.error("Failed to send email %s: %s", template_name, e)
+            return {"error": str(e)}
+
+    async def send_batch(
+        self, template_name: str, email_datas: List[Dict[str, Any]], max_inflight: int = 20
+    ) -> List[Dict[str, Any]]:
+        """
+        Send one template to many recipients concurrently.
+        Outbound requests are still capped and paced by the shared Resend limiter.
+        """
+        semaphore = asyncio.Semaphore(max_inflight)
+        
+        async def _send_one(email_data: Dict[str, Any]) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.send_notification_email(template_name, email_data)
+        
+        results = await asyncio.gather(
+            *[_send_one(email_data) for email_data in email_datas], return_exceptions=True
+        )
+        return [
+            {"error": str(result)} if isinstance(result, Exception) else result
+            for result in results
+        ]
+
+    def _template_order_confirmation(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Order confirmation email template - Updated for prices in cents"""
+        customer_name = data.get("user_name", "Valued Customer")
+        order_number = data.get("order_number", "N/A")
+        total_cents = data.get("total", 0)  # Total is in cents
+        items = data.get("items", [])
         
-        html_content = self._get_base_template(
+        # Layout and content render in one pass (the template extends "base");
+        # all price fields are in cents and the template converts them to dollars
+        html_content = TEMPLATES["order_confirmation"].render(
             title="Order Confirmed!",
-            content=content,
             cta_text="Track Your Order",
-            cta_link=f"https://jasonjewels.com/orders/{order_number}"
+            cta_link=f"https://jasonjewels.com/orders/{order_number}",
+            footer=self._footer,
+            customer_name=customer_name,
+            order_number=order_number,
+            total_cents=total_cents,
+            items=items
         )
         
         return {
             "from": self.from_email,
             "to": data["to"],
-            "subject": f"Order Confirmation - {order_number} | Jason & Co.",
+            "subject": _header_safe(f"Order Confirmation - {order_number} | Jason & Co."),
             "html": html_content
         }
 
-    # Legacy function for backward compatibility - Updated for cents
-    def send_order_confirmation_email(self, to_email: str, order_number: str, order_details: Dict[str, Any]):
-        """Legacy function - kept for backward compatibility - Updated for prices in cents"""
-        try:
-            # Ensure total is handled correctly if passed in dollars vs cents
-            total = order_details.get("total", 0)
-            
-            # Convert items to ensure unit_price is in cents
-            items = order_details.get("items", [])
-            processed_items = []
-            
-            for item in items:
-                unit_price = item.get("unit_price", 0)
-                # If unit_price looks like it's in dollars (decimal), convert to cents
-                if isinstance(unit_price, (int, float)) and unit_price < 100:
-                    # Likely in dollars, convert to cents
-                    unit_price = int(unit_price * 100)
-                processed_items.append({
-                    **item,
-                    "unit_price": unit_price
-                })
-            
-            email_data = {
-                "to": to_email,
-                "user_name": order_details.get("customer_name", "Valued Customer"),
-                "order_number": order_number,
-                "total": total,  # Should be in cents
-                "items": processed_items
-            }
-            
-            email_content = self._template_order_confirmation(email_data)
-            response = resend.Emails.send(email_content)
-            
-            logger.info(f"Legacy order confirmation email sent to {to_email}")
-            return {"success": True, "message": "Email sent successfully", "response": response}
-            
-        except Exception as e:
-            logger.error(f"Legacy email service error: {str(e)}")
-            return {"success": False, "error": str(e)}
-
     def test_email_service(self):
         """Test function to validate email service configuration"""
         logger.info("Testing email service configuration...")
@@ -455,5 +791,14 @@ class EmailService:
             logger.error("RESEND_API_KEY is not set")
             return False
         
-        logger.info(f"Email service configured: from={self.from_email}, support={self.support_email}")
-        return True
\ No newline at end of file
+        logger.info("Email service configured: from=%s, support=%s", self.from_email, self.support_email)
+        return True
+# Every _template_<name> method is registered under <name>
+EmailService._TEMPLATES = {
+    name.removeprefix("_template_"): builder
+    for name, builder in vars(EmailService).items()
+    if name.startswith("_template_")
+}
+
+# Shared instance; import this rather than constructing new EmailService objects
+email_service = EmailService()
@@ -1,17 +1,17 @@
 # services/notification_service.py - Core notification delivery service
-from typing import Dict, Any, Optional, List
-from sqlalchemy.orm import Session
+from typing import Dict, Any, Optional, List, Mapping, Tuple
+from sqlalchemy.orm import Session, joinedload
 import asyncio
+from dataclasses import dataclass
 from enum import Enum
+from types import MappingProxyType
 import logging
 
 from app.models.user import User
 from app.models.notification_preferences import NotificationPreferenceManager
-from app.services.email_service import EmailService
+from app.services.email_service import email_service
 from app.core.db import SessionLocal
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class NotificationType(Enum):
@@ -53,6 +53,93 @@ class NotificationPriority(Enum):
     HIGH = "high"
     CRITICAL = "critical"
 
+@dataclass(frozen=True, slots=True)
+class NotifConfig:
+    """Delivery configuration for a notification type"""
+    category: str  # Preference category, e.g. "email_notifications"
+    key: str  # Preference key within the category
+    channels: Tuple[NotificationChannel, ...]  # Default channels
+    priority: NotificationPriority
+    required: bool  # Sent regardless of user preferences
+    template_name: str  # Email template
+    sms_key: Optional[str]  # sms_notifications key; None when the type has no SMS preference
+
+def _notif_config(category, key, channels, priority, required, template_name) -> NotifConfig:
+    sms_key = None
+    if category == "email_notifications":
+        sms_key = key.replace("_notifications", "_alerts").replace("_confirmations", "_notifications")
+    return NotifConfig(category, key, channels, priority, required, template_name, sms_key)
+
+_EMAIL_ONLY = (NotificationChannel.EMAIL,)
+_EMAIL_AND_SMS = (NotificationChannel.EMAIL, NotificationChannel.SMS)
+
+# Built once at import and read-only, so the send path never rebuilds it
+_NOTIF_CONFIG: Mapping[NotificationType, NotifConfig] = MappingProxyType({
+    # Order notifications -> email_notifications category
+    NotificationType.ORDER_CONFIRMATION: _notif_config(
+        "email_notifications", "order_confirmations", _EMAIL_AND_SMS, NotificationPriority.HIGH, True, "order_confirmation"
+    ),
+    NotificationType.ORDER_UPDATE: _notif_config(
+        "email_notifications", "order_updates", _EMAIL_AND_SMS, NotificationPriority.MEDIUM, False, "order_update"
+    ),
+    NotificationType.SHIPPING_NOTIFICATION: _notif_config(
+        "email_notifications", "shipping_notifications", _EMAIL_AND_SMS, NotificationPriority.MEDIUM, False, "order_shipped"
+    ),
+    NotificationType.DELIVERY_CONFIRMATION: _notif_config(
+        "email_notifications", "delivery_confirmations", _EMAIL_AND_SMS, NotificationPriority.MEDIUM, False, "order_delivered"
+    ),
+    NotificationType.PAYMENT_RECEIPT: _notif_config(
+        "email_notifications", "payment_receipts", _EMAIL_ONLY, NotificationPriority.HIGH, True, "payment_receipt"
+    ),
+    NotificationType.RETURN_REFUND: _notif_config(
+        "email_notifications", "returns_refunds", _EMAIL_ONLY, NotificationPriority.MEDIUM, False, "return_refund"
+    ),
+
+    # Marketing notifications -> marketing_notifications category
+    NotificationType.NEW_PRODUCT: _notif_config(
+        "marketing_notifications", "new_products", _EMAIL_ONLY, NotificationPriority.LOW, False, "new_product"
+    ),
+    NotificationType.SALES_PROMOTION: _notif_config(
+        "marketing_notifications", "sales_promotions", _EMAIL_ONLY, NotificationPriority.LOW, False, "sales_promotion"
+    ),
+    NotificationType.EXCLUSIVE_OFFER: _notif_config(
+        "marketing_notifications", "exclusive_offers", _EMAIL_ONLY, NotificationPriority.MEDIUM, False, "exclusive_offer"
+    ),
+    NotificationType.COLLECTION_LAUNCH: _notif_config(
+        "marketing_notifications", "collection_launches", _EMAIL_ONLY, NotificationPriority.LOW, False, "collection_launch"
+    ),
+    NotificationType.WISHLIST_UPDATE: _notif_config(
+        "marketing_notifications", "wishlist_updates", _EMAIL_ONLY, NotificationPriority.LOW, False, "wishlist_update"
+    ),
+    NotificationType.PRICE_DROP: _notif_config(
+        "marketing_notifications", "price_drops", _EMAIL_ONLY, NotificationPriority.MEDIUM, False, "price_drop"
+    ),
+    NotificationType.ABANDONED_CART: _notif_config(
+        "marketing_notifications", "abandoned_cart", _EMAIL_ONLY, NotificationPriority.LOW, False, "abandoned_cart"
+    ),
+
+    # Account notifications -> account_notifications category
+    NotificationType.SECURITY_ALERT: _notif_config(
+        "account_notifications", "security_alerts", _EMAIL_AND_SMS, NotificationPriority.CRITICAL, True, "security_alert"
+    ),
+    NotificationType.PASSWORD_CHANGE: _notif_config(
+        "account_notifications", "password_changes", _EMAIL_ONLY, NotificationPriority.HIGH, True, "password_change"
+    ),
+    NotificationType.PROFILE_UPDATE: _notif_config(
+        "account_notifications", "profile_updates", _EMAIL_ONLY, NotificationPriority.LOW, False, "profile_update"
+    ),
+    NotificationType.PRIVACY_UPDATE: _notif_config(
+        "account_notifications", "privacy_updates", _EMAIL_ONLY, NotificationPriority.MEDIUM, False, "privacy_update"
+    ),
+})
+
+def _prefetch_batch(db: Session, user_ids: List[int]) -> Dict[int, User]:
+    """Load users with their notification preferences in one query, keyed by id."""
+    users = db.query(User).options(
+        joinedload(User.notification_preferences)
+    ).filter(User.id.in_(user_ids)).all()
+    return {user.id: user for user in users}
+
 class NotificationService:
     """
     Core notification service that handles delivery across all channels.
@@ -60,122 +147,7 @@ class NotificationService:
     """
     
     def __init__(self):
-        self.email_service = EmailService()
-        
-        # Mapping of notification types to their categories and channels
-        self.notification_mapping = {
-            # Order notifications -> email_notifications category
-            NotificationType.ORDER_CONFIRMATION: {
-                "category": "email_notifications",
-                "key": "order_confirmations",
-                "channels": [NotificationChannel.EMAIL, NotificationChannel.SMS],
-                "priority": NotificationPriority.HIGH,
-                "required": True
-            },
-            NotificationType.ORDER_UPDATE: {
-                "category": "email_notifications", 
-                "key": "order_updates",
-                "channels": [NotificationChannel.EMAIL, NotificationChannel.SMS],
-                "priority": NotificationPriority.MEDIUM
-            },
-            NotificationType.SHIPPING_NOTIFICATION: {
-                "category": "email_notifications",
-                "key": "shipping_notifications", 
-                "channels": [NotificationChannel.EMAIL, NotificationChannel.SMS],
-                "priority": NotificationPriority.MEDIUM
-            },
-            NotificationType.DELIVERY_CONFIRMATION: {
-                "category": "email_notifications",
-                "key": "delivery_confirmations",
-                "channels": [NotificationChannel.EMAIL, NotificationChannel.SMS], 
-                "priority": NotificationPriority.MEDIUM
-            },
-            NotificationType.PAYMENT_RECEIPT: {
-                "category": "email_notifications",
-                "key": "payment_receipts",
-                "channels": [NotificationChannel.EMAIL],
-                "priority": NotificationPriority.HIGH,
-                "required": True
-            },
-            NotificationType.RETURN_REFUND: {
-                "category": "email_notifications",
-                "key": "returns_refunds",
-                "channels": [NotificationChannel.EMAIL],
-                "priority": NotificationPriority.MEDIUM
-            },
-            
-            # Marketing notifications -> marketing_notifications category  
-            NotificationType.NEW_PRODUCT: {
-                "category": "marketing_notifications",
-                "key": "new_products",
-                "channels": [NotificationChannel.EMAIL],
-                "priority": NotificationPriority.LOW
-            },
-            NotificationType.SALES_PROMOTION: {
-                "category": "marketing_notifications", 
-                "key": "sales_promotions",
-                "channels": [NotificationChannel.EMAIL],
-                "priority": NotificationPriority.LOW
-            },
-            NotificationType.EXCLUSIVE_OFFER: {
-                "category": "marketing_notifications",
-                "key": "exclusive_offers", 
-                "channels": [NotificationChannel.EMAIL],
-                "priority": NotificationPriority.MEDIUM
-            },
-            NotificationType.COLLECTION_LAUNCH: {
-                "category": "marketing_notifications",
-                "key": "collection_launches",
-                "channels": [NotificationChannel.EMAIL], 
-                "priority": NotificationPriority.LOW
-            },
-            NotificationType.WISHLIST_UPDATE: {
-                "category": "marketing_notifications",
-                "key": "wishlist_updates",
-                "channels": [NotificationChannel.EMAIL],
-                "priority": NotificationPriority.LOW
-            },
-            NotificationType.PRICE_DROP: {
-                "category": "marketing_notifications",
-                "key": "price_drops",
-                "channels": [NotificationChannel.EMAIL],
-                "priority": NotificationPriority.MEDIUM
-            },
-            NotificationType.ABANDONED_CART: {
-                "category": "marketing_notifications", 
-                "key": "abandoned_cart",
-                "channels": [NotificationChannel.EMAIL],
-                "priority": NotificationPriority.LOW
-            },
-            
-            # Account notifications -> account_notifications category
-            NotificationType.SECURITY_ALERT: {
-                "category": "account_notifications",
-                "key": "security_alerts",
-                "channels": [NotificationChannel.EMAIL, NotificationChannel.SMS],
-                "priority": NotificationPriority.CRITICAL,
-                "required": True
-            },
-            NotificationType.PASSWORD_CHANGE: {
-                "category": "account_notifications",
-                "key": "password_changes", 
-                "channels": [NotificationChannel.EMAIL],
-                "priority": NotificationPriority.HIGH,
-                "required": True
-            },
-            NotificationType.PROFILE_UPDATE: {
-                "category": "account_notifications",
-                "key": "profile_updates",
-                "channels": [NotificationChannel.EMAIL],
-                "priority": NotificationPriority.LOW
-            },
-            NotificationType.PRIVACY_UPDATE: {
-                "category": "account_notifications",
-                "key": "privacy_updates",
-                "channels": [NotificationChannel.EMAIL], 
-                "priority": NotificationPriority.MEDIUM
-            }
-        }
+        self.email_service = email_service
     
     async def send_notification(
         self,
@@ -183,7 +155,9 @@ class NotificationService:
         notification_type: NotificationType,
         template_data: Dict[str, Any],
         override_preferences: bool = False,
-        force_channels: Optional[List[NotificationChannel]] = None
+        force_channels: Optional[List[NotificationChannel]] = None,
+        db: Optional[Session] = None,
+        prefetched: Optional[Dict[int, User]] = None
     ) -> Dict[str, Any]:
         """
         Send a notification to a user across appropriate channels.
@@ -194,76 +168,92 @@ class NotificationService:
             template_data: Data for email/SMS templates
             override_preferences: Force send regardless of user preferences (for critical notifications)
             force_channels: Force specific channels (overrides preference checking)
+            db: Session to reuse; a new one is opened and closed when omitted
+            prefetched: Users from _prefetch_batch, so bulk sends skip the per-user lookups
             
         Returns:
             Dictionary with delivery results for each channel
         """
-        try:
+        owns_session = db is None
+        if owns_session:
             db = SessionLocal()
-            
-            # Get user
-            user = db.query(User).filter(User.id == user_id).first()
+        
+        try:
+            # Get user, with preferences loaded alongside
+            if prefetched is None:
+                prefetched = _prefetch_batch(db, [user_id])
+            user = prefetched.get(user_id)
             if not user:
-                logger.error(f"User {user_id} not found")
+                logger.error("User %s not found", user_id)
                 return {"error": "User not found"}
             
             # Get notification configuration
-            notification_config = self.notification_mapping.get(notification_type)
-            if not notification_config:
-                logger.error(f"Unknown notification type: {notification_type}")
+            try:
+                notification_config = _NOTIF_CONFIG[notification_type]
+            except KeyError:
+                logger.error("Unknown notification type: %s", notification_type)
                 return {"error": "Unknown notification type"}
             
             # Check if notification is allowed (unless overriding)
-            if not override_preferences and not notification_config.get("required", False):
-                is_allowed = NotificationPreferenceManager.check_notification_allowed(
-                    db, user_id, notification_config["key"], notification_config["category"]
+            preferences = user.notification_preferences
+            if not override_preferences and not notification_config.required:
+                is_allowed = NotificationPreferenceManager.check_notification_allowed_for(
+                    preferences, notification_config.key, notification_config.category
                 )
                 
                 if not is_allowed:
-                    logger.info(f"Notification {notification_type} not allowed for user {user_id}")
+                    logger.info("Notification %s not allowed for user %s", notification_type, user_id)
                     return {"skipped": "User preferences disabled this notification"}
                 
                 # Check quiet hours
-                is_quiet_hours = NotificationPreferenceManager.is_quiet_hours_active(db, user_id)
-                if is_quiet_hours and notification_config["priority"] not in [NotificationPriority.HIGH, NotificationPriority.CRITICAL]:
-                    logger.info(f"Notification {notification_type} delayed due to quiet hours for user {user_id}")
+                is_quiet_hours = NotificationPreferenceManager.is_quiet_hours_active_for(preferences)
+                if is_quiet_hours and notification_config.priority not in (NotificationPriority.HIGH, NotificationPriority.CRITICAL):
+                    logger.info("Notification %s delayed due to quiet hours for user %s", notification_type, user_id)
                     # TODO: Queue for later delivery
                     return {"delayed": "Notification delayed due to quiet hours"}
             
             # Determine channels to use
-            channels_to_use = force_channels or notification_config["channels"]
+            channels_to_use = force_channels or notification_config.channels
             
-            # Send to each channel
+            # Send to every channel concurrently, so a two-channel notification
+            # takes as long as the slower channel rather than both combined
             results = {}
+            channel_sends = []
             
             for channel in channels_to_use:
-                try:
-                    if channel == NotificationChannel.EMAIL:
-                        result = await self._send_email_notification(
-                            user, notification_type, template_data, db
-                        )
-                        results["email"] = result
-                        
-                    elif channel == NotificationChannel.SMS:
-                        result = await self._send_sms_notification(
-                            user, notification_type, template_data, db
-                        )
-                        results["sms"] = result
-                        
-                    elif channel == NotificationChannel.PUSH:
-                        # TODO: Implement push notifications
-                        results["push"] = {"status": "not_implemented"}
-                        
-                    elif channel == NotificationChannel.IN_APP:
-                        # TODO: Implement in-app notifications
-                        results["in_app"] = {"status": "not_implemented"}
-                        
-                except Exception as e:
-                    logger.error(f"Failed to send {channel.value} notification: {str(e)}")
-                    results[channel.value] = {"error": str(e)}
+                if channel == NotificationChannel.EMAIL:
+                    channel_sends.append((channel, self._send_email_notification(
+                        user, notification_type, template_data, db
+                    )))
+                    
+                elif channel == NotificationChannel.SMS:
+                    channel_sends.append((channel, self._send_sms_notification(
+                        user, notification_type, template_data, db
+                    )))
+                    
+                elif channel == NotificationChannel.PUSH:
+                    # TODO: Implement push notifications
+                    results["push"] = {"status": "not_implemented"}
+                    
+                elif channel == NotificationChannel.IN_APP:
+                    # TODO: Implement in-app notifications
+                    results["in_app"] = {"status": "not_implemented"}
+            
+            channel_results = await asyncio.gather(
+                *(send for _, send in channel_sends), return_exceptions=True
+            )
+            for (channel, _), result in zip(channel_sends, channel_results):
+                if isinstance(result, Exception):
+                    logger.error(
+                        "Failed to send %s notification: %s", channel.value, result,
+                        exc_info=result,
+                        extra={"user_id": user_id, "notification_type": notification_type.value, "channel": channel.value}
+                    )
+                    result = {"error": str(result)}
+                results[channel.value] = result
             
             # Log successful delivery
-            logger.info(f"Notification {notification_type} sent to user {user_id}: {results}")
+            logger.info("Notification %s sent to user %s: %s", notification_type, user_id, results)
             
             return {
                 "success": True,
@@ -273,10 +263,14 @@ class NotificationService:
             }
             
         except Exception as e:
-            logger.error(f"Failed to send notification {notification_type} to user {user_id}: {str(e)}")
+            logger.exception(
+                "Failed to send notification %s to user %s: %s", notification_type, user_id, e,
+                extra={"user_id": user_id, "notification_type": getattr(notification_type, "value", notification_type)}
+            )
             return {"error": str(e)}
         finally:
-            db.close()
+            if owns_session:
+                db.close()
     
     async def _send_email_notification(
         self, 
@@ -287,30 +281,7 @@ class NotificationService:
     ) -> Dict[str, Any]:
         """Send email notification using the email service."""
         try:
-            # Map notification types to email templates
-            template_mapping = {
-                NotificationType.ORDER_CONFIRMATION: "order_confirmation",
-                NotificationType.ORDER_UPDATE: "order_update", 
-                NotificationType.SHIPPING_NOTIFICATION: "order_shipped",
-                NotificationType.DELIVERY_CONFIRMATION: "order_delivered",
-                NotificationType.PAYMENT_RECEIPT: "payment_receipt",
-                NotificationType.RETURN_REFUND: "return_refund",
-                NotificationType.NEW_PRODUCT: "new_product",
-                NotificationType.SALES_PROMOTION: "sales_promotion",
-                NotificationType.EXCLUSIVE_OFFER: "exclusive_offer",
-                NotificationType.COLLECTION_LAUNCH: "collection_launch", 
-                NotificationType.WISHLIST_UPDATE: "wishlist_update",
-                NotificationType.PRICE_DROP: "price_drop",
-                NotificationType.ABANDONED_CART: "abandoned_cart",
-                NotificationType.SECURITY_ALERT: "security_alert",
-                NotificationType.PASSWORD_CHANGE: "password_change",
-                NotificationType.PROFILE_UPDATE: "profile_update",
-                NotificationType.PRIVACY_UPDATE: "privacy_update"
-            }
-            
-            template_name = template_mapping.get(notification_type)
-            if not template_name:
-                return {"error": f"No email template for {notification_type}"}
+            template_name = _NOTIF_CONFIG[notification_type].template_name
             
             # Prepare email data
             email_data = {
@@ -340,20 +311,19 @@ class NotificationService:
         """Send SMS notification (placeholder for future SMS service)."""
         try:
             # Get user's SMS preferences and phone number
-            phone_number = NotificationPreferenceManager.get_sms_phone_number(db, user.id)
+            preferences = user.notification_preferences
+            phone_number = NotificationPreferenceManager.get_sms_phone_number_for(preferences)
             
             if not phone_number:
                 return {"skipped": "SMS not enabled or no phone number"}
             
             # Check if this specific SMS notification type is enabled
-            notification_config = self.notification_mapping.get(notification_type)
-            if notification_config and notification_config["category"] == "email_notifications":
-                sms_key = notification_config["key"].replace("_notifications", "_alerts").replace("_confirmations", "_notifications")
-            else:
+            sms_key = _NOTIF_CONFIG[notification_type].sms_key
+            if sms_key is None:
                 return {"skipped": "SMS not supported for this notification type"}
             
-            is_sms_enabled = NotificationPreferenceManager.check_notification_allowed(
-                db, user.id, sms_key, "sms_notifications"
+            is_sms_enabled = NotificationPreferenceManager.check_notification_allowed_for(
+                preferences, sms_key, "sms_notifications"
             )
             
             if not is_sms_enabled:
@@ -361,7 +331,7 @@ class NotificationService:
             
             # TODO: Implement actual SMS sending with Twilio
             # For now, return placeholder
-            logger.info(f"SMS notification {notification_type} would be sent to {phone_number}")
+            logger.info("SMS notification %s would be sent to %s", notification_type, phone_number)
             
             return {
                 "status": "placeholder", 
@@ -428,7 +398,7 @@ class NotificationService:
         user_ids: List[int],
         notification_type: NotificationType, 
         template_data: Dict[str, Any],
-        batch_size: int = 50
+        batch_size: int = 200
     ) -> Dict[str, Any]:
         """
         Send notifications to multiple users in batches.
@@ -436,18 +406,29 @@ class NotificationService:
         """
         results = {"success": [], "failed": [], "total": len(user_ids)}
         
-        # Process in batches to avoid overwhelming email service
+        # Batches bound the number of in-flight sends and prefetched users;
+        # pacing against provider limits is done by the email service's rate
+        # limiter and 429 backoff on every Resend call
         for i in range(0, len(user_ids), batch_size):
             batch = user_ids[i:i + batch_size]
             
-            # Send to each user in the batch
-            batch_tasks = []
-            for user_id in batch:
-                task = self.send_notification(user_id, notification_type, template_data)
-                batch_tasks.append(task)
-            
-            # Wait for batch to complete
-            batch_results = await asyncio.gather(*batch_tasks, return_exceptions=True)
+            # One session per batch. The sends share it safely because they all
+            # run on this event loop and each query is a blocking call, so no two
+            # statements are ever in flight on it at once.
+            db = SessionLocal()
+            try:
+                prefetched = _prefetch_batch(db, batch)
+                batch_tasks = [
+                    self.send_notification(
+                        user_id, notification_type, template_data, db=db, prefetched=prefetched
+                    )
+                    for user_id in batch
+                ]
+                
+                # Wait for batch to complete
+                batch_results = await asyncio.gather(*batch_tasks, return_exceptions=True)
+            finally:
+                db.close()
             
             # Process results
             for j, result in enumerate(batch_results):
@@ -458,11 +439,8 @@ class NotificationService:
                     results["success"].append({"user_id": user_id, "result": result})
                 else:
                     results["failed"].append({"user_id": user_id, "error": result.get("error", "Unknown error")})
-            
-            # Small delay between batches to be respectful to email service limits
-            await asyncio.sleep(0.1)
         
-        logger.info(f"Bulk notification {notification_type} sent to {len(results['success'])} users, {len(results['failed'])} failed")
+        logger.info("Bulk notification %s sent to %s users, %s failed", notification_type, len(results['success']), len(results['failed']))
         
         return results
 
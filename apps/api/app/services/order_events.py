@@ -1,8 +1,9 @@
 # app/services/order_events.py - Order Event Handlers with Notifications
 
+from sqlalchemy import inspect
 from sqlalchemy.orm import Session
 from app.models.user import User
-from app.models.order import Order
+from app.models.order import Order, OrderItem
 from app.services.notification_service import (
     send_order_confirmation,
     send_order_update,
@@ -12,6 +13,48 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Fixed English month names; avoids locale-aware strftime("%B") on every event
+_MONTHS = (
+    "January", "February", "March", "April", "May", "June",
+    "July", "August", "September", "October", "November", "December"
+)
+
+def _format_date(value) -> str:
+    """Format as 'August 05, 2025' (same output as strftime("%B %d, %Y"))"""
+    return f"{_MONTHS[value.month - 1]} {value.day:02d}, {value.year}"
+
+def _format_datetime(value) -> str:
+    """Format as 'August 05, 2025 at 03:07 PM' (same as strftime("%B %d, %Y at %I:%M %p"))"""
+    hour = value.hour % 12 or 12
+    meridiem = "AM" if value.hour < 12 else "PM"
+    return f"{_format_date(value)} at {hour:02d}:{value.minute:02d} {meridiem}"
+
+# Customer-facing text for each order status
+_STATUS_MESSAGES = {
+    "processing": "Your order is being prepared with care",
+    "shipped": "Your order has been shipped and is on its way",
+    "delivered": "Your order has been delivered",
+    "cancelled": "Your order has been cancelled",
+    "confirmed": "Your order has been confirmed and is being processed"
+}
+
+def _order_number(order: Order) -> str:
+    """Display number for an order, falling back to ORDER-<id>"""
+    return getattr(order, 'order_number', None) or f"ORDER-{order.id}"
+
+def _order_item_rows(db: Session, order: Order):
+    """Line items for the confirmation email.
+
+    Reuses order.items when the caller already loaded them (e.g. with
+    selectinload); otherwise selects just the three columns the email needs
+    instead of lazy-loading full OrderItem rows.
+    """
+    if "items" not in inspect(order).unloaded:
+        return order.items
+    return db.query(
+        OrderItem.product_name, OrderItem.quantity, OrderItem.unit_price
+    ).filter(OrderItem.order_id == order.id).all()
+
 class OrderEventHandler:
     """
     Handles order events and triggers appropriate notifications.
@@ -22,15 +65,17 @@ class OrderEventHandler:
     async def handle_order_confirmed(db: Session, order: Order, user_clerk_id: str):
         """Handle order confirmation event"""
         try:
-            # Get user record
-            user = db.query(User).filter(User.clerk_id == user_clerk_id).first()
-            if not user:
-                logger.error(f"User not found for clerk_id: {user_clerk_id}")
+            order_number = _order_number(order)
+            
+            # Only the id is needed; send_notification loads the full user
+            user_id = db.query(User.id).filter(User.clerk_id == user_clerk_id).scalar()
+            if user_id is None:
+                logger.error("User not found for clerk_id: %s", user_clerk_id)
                 return
             
             # Prepare notification data
             notification_data = {
-                "order_number": getattr(order, 'order_number', f"ORDER-{order.id}"),
+                "order_number": order_number,
                 "total": order.total_amount,
                 "items": [
                     {
@@ -38,62 +83,60 @@ class OrderEventHandler:
                         "quantity": item.quantity,
                         "price": item.unit_price
                     }
-                    for item in order.items
+                    for item in _order_item_rows(db, order)
                 ],
                 "customer_name": f"{order.customer_first_name} {order.customer_last_name}".strip(),
-                "order_date": order.created_at.strftime("%B %d, %Y"),
+                "order_date": _format_date(order.created_at),
                 "estimated_delivery": "3-5 business days"
             }
             
             # Send notification
-            result = await send_order_confirmation(user.id, notification_data)
-            logger.info(f"Order confirmation sent for order {getattr(order, 'order_number', order.id)}: {result}")
+            result = await send_order_confirmation(user_id, notification_data)
+            logger.info("Order confirmation sent for order %s: %s", order_number, result)
             
         except Exception as e:
-            logger.error(f"Failed to handle order confirmed event: {str(e)}")
+            logger.exception(
+                "Failed to handle order confirmed event: %s", e,
+                extra={"order_id": order.id, "event": "order_confirmed"}
+            )
     
     @staticmethod
     async def handle_order_status_updated(db: Session, order: Order, old_status: str, new_status: str):
         """Handle order status change event"""
         try:
-            # Get user by order's customer email
-            user = db.query(User).filter(User.email == order.customer_email).first()
-            if not user:
-                logger.warning(f"User not found for order {getattr(order, 'order_number', order.id)}")
+            order_number = _order_number(order)
+            
+            # Get user id by order's customer email
+            user_id = db.query(User.id).filter(User.email == order.customer_email).scalar()
+            if user_id is None:
+                logger.warning("User not found for order %s", order_number)
                 return
             
             # Prepare status update data
-            status_messages = {
-                "processing": "Your order is being prepared with care",
-                "shipped": "Your order has been shipped and is on its way",
-                "delivered": "Your order has been delivered",
-                "cancelled": "Your order has been cancelled",
-                "confirmed": "Your order has been confirmed and is being processed"
-            }
-            
             notification_data = {
-                "order_number": getattr(order, 'order_number', f"ORDER-{order.id}"),
+                "order_number": order_number,
                 "status": new_status,
-                "status_message": status_messages.get(new_status, f"Your order status has been updated to {new_status}"),
-                "updated_at": order.updated_at.strftime("%B %d, %Y at %I:%M %p") if order.updated_at else "Recently"
+                "status_message": _STATUS_MESSAGES.get(new_status, f"Your order status has been updated to {new_status}"),
+                "updated_at": _format_datetime(order.updated_at) if order.updated_at else "Recently"
             }
             
             # Send appropriate notification based on status
             if new_status == "shipped":
                 # Add shipping-specific data
-                notification_data.update({
-                    "tracking_number": getattr(order, 'tracking_number', ''),
-                    "carrier": getattr(order, 'carrier', ''),
-                    "estimated_delivery": "2-3 business days"
-                })
-                result = await send_shipping_notification(user.id, notification_data)
+                notification_data["tracking_number"] = getattr(order, 'tracking_number', '')
+                notification_data["carrier"] = getattr(order, 'carrier', '')
+                notification_data["estimated_delivery"] = "2-3 business days"
+                result = await send_shipping_notification(user_id, notification_data)
             else:
-                result = await send_order_update(user.id, notification_data)
+                result = await send_order_update(user_id, notification_data)
             
-            logger.info(f"Order status update sent for order {getattr(order, 'order_number', order.id)}: {result}")
+            logger.info("Order status update sent for order %s: %s", order_number, result)
             
         except Exception as e:
-            logger.error(f"Failed to handle order status update: {str(e)}")
+            logger.exception(
+                "Failed to handle order status update: %s", e,
+                extra={"order_id": order.id, "event": "order_status_updated", "new_status": new_status}
+            )
 
 # Convenience functions for easy integration
 async def trigger_order_confirmed(db: Session, order: Order, user_clerk_id: str):
@@ -3,7 +3,7 @@
 from sqlalchemy.orm import Session
 from app.models.product import Product
 from app.models.wishlist import WishlistItem
-from app.services.notification_service import send_wishlist_price_drop
+from app.services.notification_service import notification_service, NotificationType
 import logging
 
 logger = logging.getLogger(__name__)
@@ -16,11 +16,13 @@ class WishlistEventHandler:
         # \"\"\"Handle product price drop - notify users who have it in wishlist\"\"\"
         try:
             # Find all users who have this product in their wishlist
-            wishlist_items = db.query(WishlistItem).filter(
-                WishlistItem.product_id == product.id
-            ).all()
+            user_ids = [
+                user_id for (user_id,) in db.query(WishlistItem.user_id).filter(
+                    WishlistItem.product_id == product.id
+                ).distinct()
+            ]
             
-            if not wishlist_items:
+            if not user_ids:
                 return
             
             # Prepare notification data
@@ -34,18 +36,20 @@ class WishlistEventHandler:
                 "product_image": product.image_url
             }
             
-            # Send notifications to all users
-            for item in wishlist_items:
-                try:
-                    result = await send_wishlist_price_drop(item.user_id, notification_data)
-                    logger.info(f"Price drop notification sent to user {item.user_id}: {result}")
-                except Exception as e:
-                    logger.error(f"Failed to send price drop notification to user {item.user_id}: {str(e)}")
+            # Send notifications to all users, a batch at a time concurrently
+            results = await notification_service.send_bulk_notification(
+                user_ids=user_ids,
+                notification_type=NotificationType.PRICE_DROP,
+                template_data=notification_data
+            )
             
-            logger.info(f"Price drop notifications sent for product {product.id} to {len(wishlist_items)} users")
+            logger.info("Price drop notifications sent for product %s to %s of %s users", product.id, len(results['success']), len(user_ids))
             
         except Exception as e:
-            logger.error(f"Failed to handle price drop event: {str(e)}")
+            logger.exception(
+                "Failed to handle price drop event: %s", e,
+                extra={"product_id": product.id, "event": "price_drop"}
+            )
 
 # Convenience function
 async def trigger_price_drop_notifications(db: Session, product_id: int, old_price: float, new_price: float):
@@ -1,8 +1,13 @@
 # app/tasks/notification_tasks.py - Background Tasks for Notifications
 
+import asyncio
+from typing import Optional
+
 from celery import Celery
+from celery.signals import worker_process_init, worker_process_shutdown
 from app.core.db import SessionLocal
 from app.services.cart_events import check_abandoned_carts
+from app.services.email_service import close_email_client
 from app.services.wishlist_events import trigger_price_drop_notifications
 import logging
 
@@ -11,23 +16,49 @@ logger = logging.getLogger(__name__)
 # If you're using Celery for background tasks
 celery_app = Celery('notifications')
 
+# One event loop per worker process, reused by every task so the pooled
+# Resend client (kept per loop in email_service) survives between tasks
+_worker_loop: Optional[asyncio.AbstractEventLoop] = None
+
+def _get_worker_loop() -> asyncio.AbstractEventLoop:
+    global _worker_loop
+    if _worker_loop is None or _worker_loop.is_closed():
+        _worker_loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(_worker_loop)
+    return _worker_loop
+
+@worker_process_init.connect
+def _init_worker_loop(**kwargs):
+    # Forked children must not inherit the parent's loop; start a fresh one
+    global _worker_loop
+    _worker_loop = None
+    _get_worker_loop()
+
+@worker_process_shutdown.connect
+def _close_worker_loop(**kwargs):
+    global _worker_loop
+    if _worker_loop is not None and not _worker_loop.is_closed():
+        _worker_loop.run_until_complete(close_email_client())
+        _worker_loop.close()
+    _worker_loop = None
+
 @celery_app.task
 def check_abandoned_carts_task():
     # \"\"\"Background task to check for abandoned carts\"\"\"
     db = SessionLocal()
     try:
-        import asyncio
-        asyncio.run(check_abandoned_carts(db))
+        _get_worker_loop().run_until_complete(check_abandoned_carts(db))
     finally:
         db.close()
 
-@celery_app.task  
+@celery_app.task
 def send_price_drop_notifications_task(product_id: int, old_price: float, new_price: float):
     # \"\"\"Background task to send price drop notifications\"\"\"
     db = SessionLocal()
     try:
-        import asyncio
-        asyncio.run(trigger_price_drop_notifications(db, product_id, old_price, new_price))
+        _get_worker_loop().run_until_complete(
+            trigger_price_drop_notifications(db, product_id, old_price, new_price)
+        )
     finally:
         db.close()
 
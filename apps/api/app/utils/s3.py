@@ -1,42 +1,163 @@
+import asyncio
+import logging
 import os
 import boto3
-from uuid import uuid4
+from boto3.s3.transfer import TransferConfig
+from botocore.compat import HAS_CRT
+from botocore.config import Config
+from botocore.exceptions import BotoCoreError, ClientError
+import secrets
+from typing import Optional
 
 AWS_REGION = os.getenv("AWS_REGION")
 AWS_S3_BUCKET = os.getenv("AWS_S3_BUCKET")
+# Upload through S3 Transfer Acceleration edges; the bucket must have it enabled
+AWS_S3_ACCELERATE = os.getenv("AWS_S3_ACCELERATE", "false").lower() == "true"
+# Open a pooled connection at startup (off by default so tests/CI stay offline)
+AWS_S3_WARMUP = os.getenv("AWS_S3_WARMUP", "false").lower() == "true"
+
+logger = logging.getLogger(__name__)
+
+_URL_PREFIX = f"https://{AWS_S3_BUCKET}.s3.{AWS_REGION}.amazonaws.com/"
+_MAX_BYTES = 10 * 1024 * 1024
+# End-to-end upload checksum verified by S3. CRC32C needs the awscrt
+# extension (botocore[crt]); zlib's C CRC32 is the fallback without it.
+_CHECKSUM_ALGORITHM = "CRC32C" if HAS_CRT else "CRC32"
+# Whole-request cap for image upload endpoints (several images plus form fields)
+MAX_UPLOAD_REQUEST_BYTES = int(os.getenv("MAX_UPLOAD_REQUEST_MB", "50")) * 1024 * 1024
+# Object key extension for each accepted image type
+_EXT_BY_TYPE = {"image/jpeg": "jpg", "image/png": "png", "image/webp": "webp"}
+_PRESIGN_EXPIRES_SECONDS = 300
+
+# Shared client: a larger keep-alive connection pool so concurrent uploads
+# reuse TLS connections instead of queueing for botocore's default 10
+_BOTO_CFG = Config(
+    region_name=AWS_REGION,
+    signature_version="s3v4",
+    s3={"addressing_style": "virtual", "use_accelerate_endpoint": AWS_S3_ACCELERATE},
+    max_pool_connections=64,
+    tcp_keepalive=True,
+    retries={"max_attempts": 3, "mode": "standard"},
+)
 
 s3_client = boto3.client(
     "s3",
-    region_name=AWS_REGION,
+    config=_BOTO_CFG,
     aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
     aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
 )
 
-def upload_inspiration_image(file) -> str:
-    MAX_SIZE_MB = 10
-    ALLOWED_TYPES = {"image/jpeg", "image/png", "image/webp"}
+# Images up to 5MB go up with a single put_object; larger ones as parallel
+# 5MB parts rather than one serial PUT
+_MULTIPART_THRESHOLD = 5 * 1024 * 1024
+_XFER = TransferConfig(
+    multipart_threshold=_MULTIPART_THRESHOLD,
+    multipart_chunksize=_MULTIPART_THRESHOLD,
+    max_concurrency=8,
+    use_threads=True,
+)
+
+def warm_s3_connection():
+    """HEAD the bucket once so the first upload reuses an open TLS connection"""
+    if not AWS_S3_WARMUP or not AWS_S3_BUCKET:
+        return
+    try:
+        s3_client.head_bucket(Bucket=AWS_S3_BUCKET)
+    except (BotoCoreError, ClientError) as e:
+        logger.warning("S3 warm-up failed: %s", e)
+
+def _filesize(file) -> int:
+    """Size of an UploadFile in bytes.
+
+    Starlette records the size while parsing the form, so the seek-to-end
+    probe is only a fallback. os.fstat is deliberately not used: fileno() on
+    an in-memory SpooledTemporaryFile forces it to roll over to disk.
+    """
+    size = getattr(file, "size", None)
+    if size is not None:
+        return size
+    file.file.seek(0, 2)  # move to end
+    size = file.file.tell()
+    file.file.seek(0)  # rewind for upload
+    return size
+
+def _sniff_image_type(f) -> Optional[str]:
+    """Content type from the file's leading bytes, or None if not JPEG/PNG/WEBP"""
+    head = f.read(12)
+    f.seek(0)
+    if head[:3] == b"\xff\xd8\xff":
+        return "image/jpeg"
+    if head[:8] == b"\x89PNG\r\n\x1a\n":
+        return "image/png"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    return None
 
-    # check type
-    if file.content_type not in ALLOWED_TYPES:
+def _inspiration_key(content_type: str) -> str:
+    # extension follows the image type, not the client's filename
+    return f"inspiration/{secrets.token_urlsafe(16)}.{_EXT_BY_TYPE[content_type]}"
+
+def upload_inspiration_image(file) -> str:
+    # check type from the file's magic bytes; the client's content_type is not trusted
+    content_type = _sniff_image_type(file.file)
+    if content_type is None:
         raise ValueError("Only JPEG, PNG, or WEBP images are allowed.")
 
     # check size
-    file.file.seek(0, 2)  # move to end
-    size_mb = file.file.tell() / (1024 * 1024)
-    if size_mb > MAX_SIZE_MB:
+    size = _filesize(file)
+    if size > _MAX_BYTES:
         raise ValueError("Image file too large. Max 10MB.")
 
-    file.file.seek(0)  # rewind for upload
+    key = _inspiration_key(content_type)
+
+    if size <= _MULTIPART_THRESHOLD:
+        # One request, without s3transfer's thread pool and queueing
+        s3_client.put_object(
+            Bucket=AWS_S3_BUCKET,
+            Key=key,
+            Body=file.file,
+            ContentType=content_type,
+            ChecksumAlgorithm=_CHECKSUM_ALGORITHM
+        )
+    else:
+        s3_client.upload_fileobj(
+            file.file,
+            AWS_S3_BUCKET,
+            key,
+            ExtraArgs={"ContentType": content_type, "ChecksumAlgorithm": _CHECKSUM_ALGORITHM},
+            Config=_XFER
+        )
+
+    return _URL_PREFIX + key
 
-    ext = file.filename.split(".")[-1]
-    key = f"inspiration/{uuid4()}.{ext}"
+def presign_inspiration_upload(content_type: str) -> dict:
+    """Presigned POST for the browser to upload an inspiration image straight to S3.
+
+    A POST policy rather than a presigned PUT, so S3 itself enforces the
+    size cap and the exact content type the URL was issued for.
+    """
+    if content_type not in _EXT_BY_TYPE:
+        raise ValueError("Only JPEG, PNG, or WEBP images are allowed.")
 
-    s3_client.upload_fileobj(
-        file.file,
+    key = _inspiration_key(content_type)
+    post = s3_client.generate_presigned_post(
         AWS_S3_BUCKET,
         key,
-        ExtraArgs={"ContentType": file.content_type}
+        Fields={"Content-Type": content_type},
+        Conditions=[
+            {"Content-Type": content_type},
+            ["content-length-range", 1, _MAX_BYTES],
+        ],
+        ExpiresIn=_PRESIGN_EXPIRES_SECONDS,
     )
 
-    return f"https://{AWS_S3_BUCKET}.s3.{AWS_REGION}.amazonaws.com/{key}"
+    return {
+        "url": post["url"],
+        "fields": post["fields"],
+        "key": key,
+        "public_url": _URL_PREFIX + key,
+    }
 
+async def upload_inspiration_image_async(file) -> str:
+    """upload_inspiration_image for async routes; the blocking S3 PUT runs in a worker thread"""
+    return await asyncio.to_thread(upload_inspiration_image, file)